@@ -0,0 +1,8 @@
+# Konfigurasi gunicorn (dibaca otomatis dari direktori kerja: `gunicorn app:app`).
+# Job background dimulai per worker setelah app dimuat, bukan saat import,
+# sehingga perintah CLI `flask ...` tidak ikut menjalankannya.
+
+
+def post_worker_init(worker):
+    from app import start_background_jobs
+    start_background_jobs()
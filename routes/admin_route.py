@@ -1,6 +1,11 @@
 # routes/admin_route.py (lanjutan dan perbaikan)
 from flask import Blueprint, jsonify, request
-from utils.verify_admin import verify_admin
+from utils.verify_admin import verify_admin, invalidate_principal
+from services import admin_stats
+from services.audit_log import record_audit_event, flush_audit_log
+from services.user_listing import user_listing_response
+from utils.pagination import QueryParamError
+from utils.error import error_handler
 from extensions import mongo
 from bson.objectid import ObjectId
 from datetime import datetime
@@ -11,10 +16,11 @@ admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 @admin_bp.route("/users", methods=["GET"])
 @verify_admin
 def get_all_users_admin():
-    users = list(mongo.db.users.find({}, {"password": 0}))
-    for user in users:
-        user["_id"] = str(user["_id"])
-    return jsonify(users), 200
+    # ?limit=&cursor= (keyset di _id), ?q= prefix username/email, ?fields=
+    try:
+        return user_listing_response(request.args), 200
+    except QueryParamError as e:
+        return error_handler(400, str(e))
 
 # ✅ PATCH Role user
 @admin_bp.route("/user/<user_id>/role", methods=["PATCH"])
@@ -28,6 +34,8 @@ def update_user_role(user_id):
         {"_id": ObjectId(user_id)},
         {"$set": {"role": new_role}}
     )
+    invalidate_principal(user_id)
+    admin_stats.invalidate_admin_stats()
     log_admin_action("update-role", user_id, f"Set role to {new_role}")
     return jsonify({"message": "Role updated"}), 200
 
@@ -36,6 +44,8 @@ def update_user_role(user_id):
 @verify_admin
 def delete_user_by_admin(user_id):
     mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+    invalidate_principal(user_id)
+    admin_stats.invalidate_admin_stats()
     log_admin_action("delete-user", user_id, "Deleted user")
     return jsonify({"message": "User deleted by admin"}), 200
 
@@ -43,32 +53,7 @@ def delete_user_by_admin(user_id):
 @admin_bp.route("/stats", methods=["GET"])
 @verify_admin
 def get_admin_stats():
-    user_count = mongo.db.users.count_documents({})
-    message_count = mongo.db.contacts.count_documents({})
-    dataset_count = mongo.db.exoplanets.count_documents({})
-
-    role_dist = mongo.db.users.aggregate([
-        {"$group": {"_id": "$role", "value": {"$sum": 1}}},
-    ])
-
-    # Aktivitas kontak selama 7 hari terakhir
-    from datetime import datetime, timedelta
-    days = [datetime.utcnow() - timedelta(days=i) for i in range(6, -1, -1)]
-    activity = []
-    for day in days:
-        next_day = day + timedelta(days=1)
-        count = mongo.db.contacts.count_documents({
-            "timestamp": {"$gte": day, "$lt": next_day}
-        })
-        activity.append({"date": day.strftime('%Y-%m-%d'), "count": count})
-
-    return jsonify({
-        "totalUsers": user_count,
-        "totalMessages": message_count,
-        "totalDatasets": dataset_count,
-        "userRoles": list(role_dist),
-        "contactActivity": activity
-    }), 200
+    return jsonify(admin_stats.get_admin_stats()), 200
 
 # ✅ Settings GET + PUT (1 dokumen tunggal)
 @admin_bp.route("/settings", methods=["GET"])
@@ -91,6 +76,7 @@ def update_settings():
 @admin_bp.route("/audit-trail", methods=["GET"])
 @verify_admin
 def get_audit_trail():
+    flush_audit_log()  # event dari worker ini langsung terlihat
     logs = list(mongo.db.audit_logs.find().sort("timestamp", -1).limit(100))
     for log in logs:
         log["_id"] = str(log["_id"])
@@ -100,7 +86,8 @@ def get_audit_trail():
 # 🔧 Fungsi internal log
 
 def log_admin_action(action, target_id, description):
-    mongo.db.audit_logs.insert_one({
+    # Masuk antrean audit; ditulis batch oleh thread background (services/audit_log.py)
+    record_audit_event({
         "action": action,
         "target_id": str(target_id),
         "description": description,
@@ -0,0 +1,202 @@
+import time
+import threading
+from functools import partial
+import requests
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.table_registry import ARCHIVE_TABLES, build_table_query, mongo_sort, page_spec_for
+from services.archive_mirror import read_table, data_timestamp
+from services.table_stream import stream_table
+from services.tap_concurrency import fetch_with_fallback
+from services.warmup import register_hot_query
+from services.tap_cache import register_disk_query
+from services import disk_cache
+from services.derived_physics import add_derived, derived_map
+from utils.pagination import (
+    QueryParamError, wants_page_query, parse_page_query, build_page_adql, build_page_response, page_sort,
+)
+from utils.formats import UnsupportedFormatError, negotiate_format, format_rows, format_error
+from utils.http_cache import apply_cache_headers, not_modified, version_etag
+from utils.compression import stream_body_dir
+from utils.error import error_handler
+
+archive_bp = Blueprint("archive", __name__)
+
+# Metrik sederhana per tabel (per worker): jumlah request, error, total waktu
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(spec, started, error=False):
+    elapsed_ms = (time.time() - started) * 1000
+    with _metrics_lock:
+        entry = _metrics.setdefault(spec["name"], {"requests": 0, "errors": 0, "total_ms": 0.0})
+        entry["requests"] += 1
+        entry["total_ms"] += elapsed_ms
+        if error:
+            entry["errors"] += 1
+
+
+def _load_rows(spec, query):
+    return read_table(query, spec["table"], spec.get("mongo_filter"), mongo_sort(spec),
+                      limit=spec.get("max_rows") or 0, timeout=spec.get("timeout"))
+
+
+def _empty_response(spec, fallback_data=None):
+    fallback = spec.get("fallback")
+    if fallback:
+        return jsonify({"message": fallback["message"], fallback["key"]: fallback_data}), 404
+    if spec.get("empty"):
+        return jsonify({"message": spec["empty"], "available_columns": spec["columns"]}), 404
+    return jsonify([])
+
+
+def _serve_page(spec, page_spec):
+    """
+    Serve one keyset page, with filters and projection pushed down into
+    the ADQL (or the Mongo mirror).
+    """
+    page = parse_page_query(request.args, page_spec)
+    query = build_page_adql(page_spec, page)
+    rows = read_table(query, spec["table"], page["mongo_filter"], page_sort(page_spec),
+                      limit=page["limit"] + 1, timeout=spec.get("timeout"))
+    if page["derived"]:
+        rows = add_derived(rows, page["derived"], build_table_query(spec), spec["table"])
+    result = build_page_response(rows, page_spec, page)
+    fmt = negotiate_format()
+    if fmt:
+        # Format non-JSON tidak punya envelope; cursor dikirim lewat header
+        response = format_rows(result["data"], fmt, spec["table"])
+        if result["next_cursor"]:
+            response.headers["X-Next-Cursor"] = result["next_cursor"]
+    else:
+        response = jsonify(result)
+    return _cacheable(spec, response, query)
+
+
+def _cacheable(spec, response, query, etag=None):
+    return apply_cache_headers(response, data_timestamp(query, spec["table"]), etag, max_age=spec.get("max_age"))
+
+
+def _serve_stream(spec, query):
+    """
+    Stream a large table. The body can't be hashed before it is sent, so
+    its ETag is derived from the URL and the data's fetch/sync time, and
+    revalidations are answered before any rows are read.
+    """
+    last_modified = data_timestamp(query, spec["table"])
+    if last_modified:
+        etag = version_etag(request.full_path, query, last_modified)
+        response = not_modified(etag, last_modified, max_age=spec.get("max_age"))
+        if response is not None:
+            return response
+
+    chunks, body_dir = stream_table(query, spec["table"], spec.get("mongo_filter"), mongo_sort(spec),
+                                    limit=spec.get("max_rows") or 0, timeout=spec.get("timeout"))
+    if chunks is None:
+        return _empty_response(spec)
+    # Pada miss, stream_table baru saja mengisi tier disk
+    last_modified = data_timestamp(query, spec["table"])
+    etag = version_etag(request.full_path, query, last_modified) if last_modified else None
+    response = Response(stream_with_context(chunks), mimetype="application/json")
+    if body_dir and etag:
+        # Body terkompresi per versi data disimpan di samping entri cache disk
+        stream_body_dir(response, body_dir)
+    return apply_cache_headers(response, last_modified, etag, max_age=spec.get("max_age"))
+
+
+def _serve_table(spec, page_spec):
+    if page_spec and wants_page_query(request.args, page_spec):
+        return _serve_page(spec, page_spec)
+
+    query = build_table_query(spec)
+
+    fmt = negotiate_format()
+    if fmt:
+        return _cacheable(spec, format_rows(_load_rows(spec, query), fmt, spec["table"]), query)
+
+    # Tabel panas dibaca dari tier disk (mmap) per batch, tanpa salinan per
+    # worker. Tanpa tier disk, tabel panas tetap lewat cached_call (single-flight)
+    if spec.get("stream") or (spec.get("warm") and disk_cache.DISK_CACHE_ENABLED):
+        return _serve_stream(spec, query)
+
+    if spec.get("fallback"):
+        # Main query and (speculative) fallback run concurrently
+        data, fallback_data = fetch_with_fallback(lambda: _load_rows(spec, query), spec["fallback"]["query"])
+        if not data:
+            return _empty_response(spec, fallback_data)
+        return _cacheable(spec, jsonify(data), query)
+
+    data = _load_rows(spec, query)
+    if not data and spec.get("empty"):
+        return _empty_response(spec)
+    return _cacheable(spec, jsonify(data), query)
+
+
+def make_table_view(spec):
+    page_spec = page_spec_for(spec)
+    label = spec["label"]
+
+    def view():
+        started = time.time()
+        error = True
+        try:
+            response = _serve_table(spec, page_spec)
+            error = False
+            return response
+        except QueryParamError as e:
+            return error_handler(400, str(e))
+        except UnsupportedFormatError as e:
+            return format_error(e)
+        except requests.exceptions.HTTPError as http_err:
+            status_code = http_err.response.status_code if http_err.response is not None else 502
+            return jsonify({
+                "error": f"HTTP error from {label} service",
+                "details": str(http_err),
+                "status_code": status_code
+            }), status_code
+        except requests.exceptions.Timeout:
+            return jsonify({"error": f"Request to {label} service timed out"}), 504
+        except requests.exceptions.RequestException as req_err:
+            return jsonify({
+                "error": f"General connection error to {label} service",
+                "details": str(req_err)
+            }), 502
+        except ValueError as e:
+            return jsonify({"error": f"Invalid JSON received from {label} service.", "details": str(e)}), 502
+        finally:
+            _record(spec, started, error)
+
+    view.__name__ = spec["name"]
+    view.__doc__ = f"Fetch data from the {spec['description']}."
+    return view
+
+
+for _spec in ARCHIVE_TABLES:
+    archive_bp.add_url_rule(_spec["path"], endpoint=_spec["name"], view_func=make_table_view(_spec), methods=["GET"])
+    # Hanya query tabel penuh yang disimpan ke tier disk (bukan halaman/filter)
+    register_disk_query(build_table_query(_spec))
+    if _spec.get("warm"):
+        # Kolom turunan dihitung sekali setelah tabel di-warm (per refresh data)
+        _after = partial(derived_map, build_table_query(_spec), _spec["table"]) if _spec.get("derived") else None
+        register_hot_query(_spec["name"], build_table_query(_spec), after=_after)
+
+
+@archive_bp.route("/api/tables", methods=["GET"])
+def list_archive_tables():
+    """
+    List the registered archive tables with their per-worker metrics.
+    """
+    with _metrics_lock:
+        metrics = {name: dict(entry) for name, entry in _metrics.items()}
+    return jsonify([
+        {
+            "path": spec["path"],
+            "table": spec["table"],
+            "description": spec["description"],
+            "columns": spec["columns"],
+            "paginated": bool(spec.get("keyset")),
+            "streamed": bool(spec.get("stream")),
+            "metrics": metrics.get(spec["name"], {"requests": 0, "errors": 0, "total_ms": 0.0}),
+        }
+        for spec in ARCHIVE_TABLES
+    ])
@@ -4,15 +4,31 @@ from models.user_model import create_user, find_user_by_email
 from utils.error import error_handler
 from werkzeug.security import check_password_hash
 from extensions import mongo
+from pymongo.errors import DuplicateKeyError
 import jwt
 import os
 import datetime
+import uuid
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 # Frontend origin yang diizinkan
 FRONTEND_URL = "https://exo-planet-service-frontend-n5ig-5cmpfimi1.vercel.app"
 
+
+def issue_token(user):
+    # jti = id token (kunci cache principal admin), role ikut sebagai klaim
+    return jwt.encode(
+        {
+            "id": str(user['_id']),
+            "role": user.get("role", "user"),
+            "jti": uuid.uuid4().hex,
+            "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24),
+        },
+        os.environ.get("JWT_SECRET", "secret"),
+        algorithm="HS256"
+    )
+
 # 🔹 GOOGLE LOGIN
 @auth_bp.route('/google', methods=['POST'])
 @cross_origin(
@@ -33,21 +49,20 @@ def google_login():
     user = find_user_by_email(mongo, email)
 
     if not user:
-        create_user(
-            mongo,
-            username=name,
-            email=email,
-            password="",
-            avatar=avatar,
-            role='user'
-        )
+        try:
+            create_user(
+                mongo,
+                username=name,
+                email=email,
+                password="",
+                avatar=avatar,
+                role='user'
+            )
+        except DuplicateKeyError:
+            pass  # login bersamaan sudah membuat user ini (index unik users.email)
         user = find_user_by_email(mongo, email)
 
-    token = jwt.encode(
-        {"id": str(user['_id']), "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24)},
-        os.environ.get("JWT_SECRET", "secret"),
-        algorithm="HS256"
-    )
+    token = issue_token(user)
 
     user_response = {
         "_id": str(user["_id"]),
@@ -89,14 +104,13 @@ def signup():
     if find_user_by_email(mongo, email):
         return error_handler(400, "User already exists")
 
-    create_user(mongo, username=username, email=email, password=password, role=role)
+    try:
+        create_user(mongo, username=username, email=email, password=password, role=role)
+    except DuplicateKeyError:
+        return error_handler(400, "User already exists")
     user = find_user_by_email(mongo, email)
 
-    token = jwt.encode(
-        {"id": str(user['_id']), "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24)},
-        os.environ.get("JWT_SECRET", "secret"),
-        algorithm="HS256"
-    )
+    token = issue_token(user)
 
     user_response = {
         "_id": str(user["_id"]),
@@ -140,11 +154,7 @@ def signin():
     if not check_password_hash(user['password'], password):
         return error_handler(401, "Wrong credentials!")
 
-    token = jwt.encode(
-        {"id": str(user['_id']), "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=24)},
-        os.environ.get("JWT_SECRET", "secret"),
-        algorithm="HS256"
-    )
+    token = issue_token(user)
 
     user_response = {
         "_id": str(user["_id"]),
@@ -0,0 +1,58 @@
+import requests
+from flask import Blueprint, jsonify, request
+from services.resolver import MAX_RESULTS, resolve, resolve_many, get_index
+from utils.error import error_handler
+from utils.http_cache import apply_cache_headers
+
+resolve_bp = Blueprint("resolve", __name__)
+
+RESOLVE_MODES = ("auto", "exact", "prefix", "fuzzy")
+MAX_BATCH_NAMES = 1000
+
+
+def _limit():
+    try:
+        return max(1, min(int(request.args.get("limit", MAX_RESULTS)), MAX_RESULTS))
+    except ValueError:
+        return MAX_RESULTS
+
+
+@resolve_bp.route("/api/resolve", methods=["GET"])
+def resolve_name():
+    """
+    Resolve a Kepler / K2 / host name or catalog id (kepid, EPIC, TIC,
+    Gaia, HD, HIP) to the matching archive rows.
+    """
+    name = request.args.get("name", "").strip()
+    mode = request.args.get("mode", "auto")
+    if not name:
+        return error_handler(400, "name is required")
+    if mode not in RESOLVE_MODES:
+        return error_handler(400, f"mode must be one of: {', '.join(RESOLVE_MODES)}")
+    try:
+        match, records = resolve(name, mode, _limit())
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": "Failed to load resolver tables", "details": str(e)}), 502
+    if not records:
+        return jsonify({"message": f"No match found for {name}.", "query": name}), 404
+    response = jsonify({"query": name, "match": match, "results": records})
+    return apply_cache_headers(response, get_index().built_at)
+
+
+@resolve_bp.route("/api/resolve", methods=["POST"])
+def resolve_names():
+    """
+    Resolve many names at once (exact matches only).
+    Body: {"names": ["Kepler-22 b", "KIC 10593626", ...]}
+    """
+    body = request.get_json(silent=True) or {}
+    names = body.get("names")
+    if not isinstance(names, list) or not names:
+        return error_handler(400, "names must be a non-empty list")
+    if len(names) > MAX_BATCH_NAMES:
+        return error_handler(400, f"At most {MAX_BATCH_NAMES} names per request")
+    try:
+        results = resolve_many([str(name) for name in names])
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": "Failed to load resolver tables", "details": str(e)}), 502
+    return jsonify({"results": results, "unresolved": [name for name, records in results.items() if not records]})
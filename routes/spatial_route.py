@@ -0,0 +1,79 @@
+import requests
+from flask import Blueprint, jsonify, request
+from services.spatial_index import (
+    SPATIAL_CATALOGS, MAX_RESULTS, SpatialQueryError, cone_search, nearest_search, box_search,
+)
+from utils.error import error_handler
+
+spatial_bp = Blueprint("spatial", __name__)
+
+
+def _float_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None:
+        if default is None:
+            raise SpatialQueryError(f"{name} is required")
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise SpatialQueryError(f"{name} must be a number")
+
+
+def _int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        raise SpatialQueryError(f"{name} must be an integer")
+
+
+def _search(search):
+    catalog = request.args.get("catalog", "")
+    try:
+        rows = search(catalog)
+    except SpatialQueryError as e:
+        return error_handler(400, str(e))
+    except requests.exceptions.Timeout:
+        return jsonify({"error": f"Request to {catalog} service timed out"}), 504
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": f"General connection error to {catalog} service", "details": str(e)}), 502
+    return jsonify({"catalog": catalog, "count": len(rows), "data": rows})
+
+
+@spatial_bp.route("/api/cone-search", methods=["GET"])
+def cone_search_route():
+    """
+    Objects within ?radius= degrees of ?ra=&dec= (ICRS degrees), nearest
+    first; each row carries its distance in `_dist`.
+    """
+    return _search(lambda catalog: cone_search(
+        catalog, _float_arg("ra"), _float_arg("dec"), _float_arg("radius"), _int_arg("limit", MAX_RESULTS)
+    ))
+
+
+@spatial_bp.route("/api/nearest", methods=["GET"])
+def nearest_route():
+    """
+    The ?k= nearest objects to ?ra=&dec= in a locally indexed catalog.
+    """
+    return _search(lambda catalog: nearest_search(catalog, _float_arg("ra"), _float_arg("dec"), _int_arg("k", 1)))
+
+
+@spatial_bp.route("/api/box-search", methods=["GET"])
+def box_search_route():
+    """
+    Objects with ra_min <= ra <= ra_max (may wrap through 0) and
+    dec_min <= dec <= dec_max.
+    """
+    return _search(lambda catalog: box_search(
+        catalog, _float_arg("ra_min"), _float_arg("ra_max"), _float_arg("dec_min"), _float_arg("dec_max"),
+        _int_arg("limit", MAX_RESULTS),
+    ))
+
+
+@spatial_bp.route("/api/spatial/catalogs", methods=["GET"])
+def spatial_catalogs():
+    return jsonify([
+        {"catalog": name, "table": spec["table"], "columns": spec["columns"], "indexed": spec["local"]}
+        for name, spec in SPATIAL_CATALOGS.items()
+    ])
@@ -0,0 +1,132 @@
+import requests
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.tap_cache import peek_cached
+from services.adql_engine import run_local
+from services.tap_gateway import (
+    GATEWAY_MAX_ROWS, GATEWAY_SYNC_MAX_ROWS, QueryRejected, QuotaExceeded,
+    prepare_query, query_hash, request_owner, user_quota, run_sync, submit_job, get_job, job_result_body,
+)
+from utils.error import error_handler
+
+tap_bp = Blueprint("tap", __name__)
+
+QUERY_MODES = ("auto", "sync", "async")
+
+
+def _rows_response(rows, adql, row_limit, cache_status):
+    response = jsonify(rows)
+    response.headers["X-Query-Hash"] = query_hash(adql)
+    response.headers["X-Row-Limit"] = str(row_limit)
+    response.headers["X-Cache"] = cache_status
+    return response
+
+
+def _job_response(job_id, adql, row_limit):
+    response = jsonify({
+        "job_id": job_id,
+        "phase": "QUEUED",
+        "query": adql,
+        "row_limit": row_limit,
+        "status_url": f"/api/tap-query/jobs/{job_id}",
+    })
+    response.status_code = 202
+    response.headers["Location"] = f"/api/tap-query/jobs/{job_id}"
+    return response
+
+
+def _upstream_error(e):
+    if isinstance(e, requests.exceptions.HTTPError):
+        status_code = e.response.status_code if e.response is not None else 502
+        return jsonify({"error": "Failed to execute TAP query", "details": str(e), "status_code": status_code}), status_code
+    if isinstance(e, requests.exceptions.Timeout):
+        return jsonify({"error": "TAP query timed out", "details": str(e)}), 504
+    return jsonify({"error": "Failed to execute TAP query", "details": str(e)}), 502
+
+
+@tap_bp.route("/api/tap-query", methods=["POST"])
+def tap_query():
+    """
+    Execute a custom TAP query.
+
+    Body: {"query": ADQL, "mode": "auto" | "sync" | "async"}. In auto mode
+    queries above the sync row limit, or that time out, become async jobs
+    (202 + status URL).
+    """
+    body = request.get_json(silent=True) or {}
+    mode = body.get("mode", "auto")
+    if mode not in QUERY_MODES:
+        return error_handler(400, f"mode must be one of: {', '.join(QUERY_MODES)}")
+    try:
+        adql, row_limit = prepare_query(body.get("query"), GATEWAY_SYNC_MAX_ROWS if mode == "sync" else GATEWAY_MAX_ROWS)
+    except QueryRejected as e:
+        return error_handler(400, str(e))
+
+    # Cache hit dan query yang bisa dijawab lokal tidak memakai kuota
+    cached = peek_cached(adql)
+    if cached is not None:
+        return _rows_response(cached, adql, row_limit, "HIT")
+    local_rows = run_local(adql)
+    if local_rows is not None:
+        return _rows_response(local_rows, adql, row_limit, "LOCAL")
+
+    owner = request_owner()
+    try:
+        with user_quota.slot(owner):
+            if mode == "async" or (mode == "auto" and row_limit > GATEWAY_SYNC_MAX_ROWS):
+                return _job_response(submit_job(adql, owner), adql, row_limit)
+            try:
+                return _rows_response(run_sync(adql), adql, row_limit, "MISS")
+            except requests.exceptions.Timeout:
+                if mode == "sync":
+                    raise
+                # Terlalu lama untuk sync: lanjutkan sebagai job async
+                return _job_response(submit_job(adql, owner), adql, row_limit)
+    except QuotaExceeded as e:
+        response = error_handler(429, str(e))
+        response.headers["Retry-After"] = "5"
+        return response
+    except requests.exceptions.RequestException as e:
+        return _upstream_error(e)
+    except ValueError as e:
+        return jsonify({"error": "Invalid JSON received from TAP service.", "details": str(e)}), 502
+
+
+@tap_bp.route("/api/tap-query/jobs/<job_id>", methods=["GET"])
+def tap_job_status(job_id):
+    """
+    Return the phase of an async TAP job started by this user.
+    """
+    try:
+        job = get_job(job_id, request_owner())
+    except requests.exceptions.RequestException as e:
+        return _upstream_error(e)
+    if job is None:
+        return error_handler(404, "Job not found")
+    result = {
+        "job_id": job["_id"],
+        "phase": job["phase"],
+        "query": job["query"],
+        "created_at": job["created_at"].isoformat(),
+    }
+    if job["phase"] == "COMPLETED":
+        result["results_url"] = f"/api/tap-query/jobs/{job_id}/results"
+    if job.get("error"):
+        result["error"] = job["error"]
+    return jsonify(result)
+
+
+@tap_bp.route("/api/tap-query/jobs/<job_id>/results", methods=["GET"])
+def tap_job_results(job_id):
+    """
+    Return the rows of a completed async TAP job, streamed from the archive.
+    """
+    try:
+        job = get_job(job_id, request_owner())
+        if job is None:
+            return error_handler(404, "Job not found")
+        if job["phase"] != "COMPLETED":
+            return error_handler(409, f"Job is {job['phase']}")
+        body = job_result_body(job)
+    except requests.exceptions.RequestException as e:
+        return _upstream_error(e)
+    return Response(stream_with_context(body), mimetype="application/json")
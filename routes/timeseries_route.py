@@ -0,0 +1,36 @@
+import requests
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.timeseries_batch import BatchRequestError, validate_ids, fetch_batch
+from utils.error import error_handler
+
+timeseries_bp = Blueprint("timeseries", __name__)
+
+
+@timeseries_bp.route("/api/timeseries/batch", methods=["POST"])
+def fetch_timeseries_batch():
+    """
+    Fetch KELT / SuperWASP / UKIRT time-series metadata for many source
+    ids in one call.
+    Body: {"catalog": "kelt" | "superwasp" | "ukirt", "ids": [...]}
+    """
+    body = request.get_json(silent=True) or {}
+    catalog = body.get("catalog", "")
+    try:
+        ids = validate_ids(catalog, body.get("ids"))
+        chunks = fetch_batch(catalog, ids)
+    except BatchRequestError as e:
+        return error_handler(400, str(e))
+    except requests.exceptions.HTTPError as http_err:
+        status_code = http_err.response.status_code if http_err.response is not None else 502
+        return jsonify({
+            "error": f"HTTP error from {catalog} service",
+            "details": str(http_err),
+            "status_code": status_code
+        }), status_code
+    except requests.exceptions.Timeout:
+        return jsonify({"error": f"Request to {catalog} service timed out"}), 504
+    except requests.exceptions.RequestException as req_err:
+        return jsonify({"error": f"General connection error to {catalog} service", "details": str(req_err)}), 502
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON received from {catalog} service.", "details": str(e)}), 502
+    return Response(stream_with_context(chunks), mimetype="application/json")
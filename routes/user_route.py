@@ -2,6 +2,9 @@ from flask import Blueprint, jsonify, request
 from utils.verify_user import verify_token
 from models.user_model import find_user_by_id, update_user, delete_user
 from extensions import mongo
+from services.user_listing import user_listing_response
+from utils.pagination import QueryParamError
+from utils.error import error_handler
 
 user_bp = Blueprint('user', __name__, url_prefix='/api/user')
 
@@ -55,9 +58,8 @@ def get_current_user():
 @user_bp.route('/all', methods=['GET'])
 def get_all_users():
     try:
-        users = list(mongo.db.users.find({}, {"password": 0}))
-        for user in users:
-            user['_id'] = str(user['_id'])
-        return jsonify(users), 200
+        return user_listing_response(request.args), 200
+    except QueryParamError as e:
+        return error_handler(400, str(e))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
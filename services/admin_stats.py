@@ -0,0 +1,93 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from extensions import mongo
+
+# Statistik dashboard admin di-materialize ke satu dokumen Mongo (dipakai
+# bersama semua worker); selama masih segar, satu request = satu find_one.
+ADMIN_STATS_TTL = int(os.getenv("ADMIN_STATS_TTL", "60"))
+ADMIN_STATS_COLLECTION = "admin_stats"
+ADMIN_STATS_ID = "dashboard"
+ACTIVITY_DAYS = 7
+
+_compute_lock = threading.Lock()
+
+
+def _activity_start(now):
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=ACTIVITY_DAYS - 1)
+
+
+def compute_stats(now=None):
+    """
+    Compute the dashboard stats: one aggregation over users (role
+    distribution) unioned with the last ACTIVITY_DAYS days of contacts
+    (per-day counts), plus metadata-based collection counts.
+    """
+    now = now or datetime.utcnow()
+    start = _activity_start(now)
+    pipeline = [
+        {"$project": {"_id": 0, "role": 1, "source": "users"}},
+        {"$unionWith": {
+            "coll": "contacts",
+            "pipeline": [
+                {"$match": {"timestamp": {"$gte": start}}},
+                {"$project": {"_id": 0, "timestamp": 1, "source": "contacts"}},
+            ],
+        }},
+        {"$facet": {
+            "roles": [
+                {"$match": {"source": "users"}},
+                {"$group": {"_id": "$role", "value": {"$sum": 1}}},
+            ],
+            "activity": [
+                {"$match": {"source": "contacts"}},
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                    "count": {"$sum": 1},
+                }},
+            ],
+        }},
+    ]
+    result = next(mongo.db.users.aggregate(pipeline), {"roles": [], "activity": []})
+
+    # Hari tanpa pesan tetap muncul dengan count 0
+    per_day = {entry["_id"].strftime("%Y-%m-%d"): entry["count"] for entry in result["activity"]}
+    days = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(ACTIVITY_DAYS)]
+
+    return {
+        "totalUsers": sum(role["value"] for role in result["roles"]),
+        # Angka total di kartu dashboard tidak perlu exact: pakai metadata collection
+        "totalMessages": mongo.db.contacts.estimated_document_count(),
+        "totalDatasets": mongo.db.exoplanets.estimated_document_count(),
+        "userRoles": result["roles"],
+        "contactActivity": [{"date": day, "count": per_day.get(day, 0)} for day in days],
+    }
+
+
+def get_admin_stats():
+    """
+    Return the materialized dashboard stats, recomputing them (once per
+    worker at a time) when the stored document is older than ADMIN_STATS_TTL.
+    """
+    collection = mongo.db[ADMIN_STATS_COLLECTION]
+    cutoff = datetime.utcnow() - timedelta(seconds=ADMIN_STATS_TTL)
+    doc = collection.find_one({"_id": ADMIN_STATS_ID, "computed_at": {"$gte": cutoff}})
+    if doc:
+        return doc["stats"]
+
+    with _compute_lock:
+        doc = collection.find_one({"_id": ADMIN_STATS_ID, "computed_at": {"$gte": cutoff}})
+        if doc:
+            return doc["stats"]
+        stats = compute_stats()
+        collection.replace_one(
+            {"_id": ADMIN_STATS_ID},
+            {"stats": stats, "computed_at": datetime.utcnow()},
+            upsert=True,
+        )
+        return stats
+
+
+def invalidate_admin_stats():
+    mongo.db[ADMIN_STATS_COLLECTION].delete_one({"_id": ADMIN_STATS_ID})
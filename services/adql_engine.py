@@ -0,0 +1,410 @@
+import os
+import re
+import time
+import operator
+import threading
+import numpy as np
+from services.tap_cache import disk_table, fill_disk, register_disk_query
+from services.archive_mirror import serve_from_mirror, mirror_ready, mirror_find
+
+# Mesin ADQL lokal untuk subset sederhana:
+#   SELECT [TOP n] * | kolom, ... FROM <tabel lokal>
+#   [WHERE predikat (AND / OR / NOT / kurung)]
+#   [ORDER BY kolom [ASC|DESC], ...]
+# Predikat: kolom <op> literal, BETWEEN, IN (...), LIKE, IS [NOT] NULL.
+# Data diambil dari salinan penuh tabel di cache disk (memory-mapped) dan
+# dievaluasi per kolom dengan NumPy. Query lain -> None (pakai TAP live).
+LOCAL_TABLES = tuple(
+    name.strip().lower() for name in os.getenv("ADQL_LOCAL_TABLES", "pscomppars,toi").split(",") if name.strip()
+)
+SOURCE_CHECK_INTERVAL = 30
+SOURCE_FILL_TIMEOUT = 300
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+      | (?P<op><=|>=|<>|!=|=|<|>)
+      | (?P<punct>[(),*])
+      | (?P<ident>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+
+# Operator Python (bukan ufunc) supaya perbandingan kolom string juga jalan
+_COMPARATORS = {
+    "=": operator.eq, "!=": operator.ne, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_NUMERIC_KINDS = ("int", "float", "bool")
+
+
+class UnsupportedQuery(ValueError):
+    """Raised for ADQL outside the subset the local engine understands."""
+
+
+def _tokenize(adql):
+    tokens = []
+    pos = 0
+    adql = adql.rstrip()
+    while pos < len(adql):
+        match = _TOKEN_RE.match(adql, pos)
+        if not match or match.end() == pos:
+            raise UnsupportedQuery(f"Unexpected input at {pos}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "string":
+            tokens.append(("string", text[1:-1].replace("''", "'")))
+        elif kind == "number":
+            tokens.append(("number", float(text) if any(c in text for c in ".eE") else int(text)))
+        elif kind == "ident":
+            tokens.append(("ident", text))
+        else:
+            tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser producing a small query dict.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def at_keyword(self, *words):
+        kind, value = self.peek()
+        return kind == "ident" and value.upper() in words
+
+    def keyword(self, word):
+        if not self.at_keyword(word):
+            raise UnsupportedQuery(f"Expected {word}")
+        self.pos += 1
+
+    def identifier(self):
+        kind, value = self.next()
+        if kind != "ident" or "." in value:
+            raise UnsupportedQuery("Expected a plain column name")
+        return value
+
+    def literal(self):
+        kind, value = self.next()
+        if kind not in ("string", "number"):
+            raise UnsupportedQuery("Expected a literal")
+        return value
+
+    def parse(self):
+        self.keyword("SELECT")
+        if self.at_keyword("DISTINCT"):
+            raise UnsupportedQuery("DISTINCT is not supported locally")
+        if self.at_keyword("ALL"):
+            self.next()
+        top = None
+        if self.at_keyword("TOP"):
+            self.next()
+            kind, top = self.next()
+            if kind != "number" or not isinstance(top, int):
+                raise UnsupportedQuery("TOP needs an integer")
+
+        if self.peek() == ("punct", "*"):
+            self.next()
+            columns = None
+        else:
+            columns = [self.identifier()]
+            while self.peek() == ("punct", ","):
+                self.next()
+                columns.append(self.identifier())
+
+        self.keyword("FROM")
+        table = self.identifier().lower()
+
+        where = None
+        if self.at_keyword("WHERE"):
+            self.next()
+            where = self.expression()
+
+        order = []
+        if self.at_keyword("ORDER"):
+            self.next()
+            self.keyword("BY")
+            while True:
+                column = self.identifier()
+                direction = "ASC"
+                if self.at_keyword("ASC", "DESC"):
+                    direction = self.next()[1].upper()
+                order.append((column, direction))
+                if self.peek() != ("punct", ","):
+                    break
+                self.next()
+
+        if self.peek() != (None, None):
+            raise UnsupportedQuery(f"Unsupported clause near {self.peek()[1]!r}")
+        return {"top": top, "columns": columns, "table": table, "where": where, "order": order}
+
+    def expression(self):
+        node = self.conjunction()
+        while self.at_keyword("OR"):
+            self.next()
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.at_keyword("AND"):
+            self.next()
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.at_keyword("NOT"):
+            self.next()
+            return ("not", self.negation())
+        if self.peek() == ("punct", "("):
+            self.next()
+            node = self.expression()
+            if self.next() != ("punct", ")"):
+                raise UnsupportedQuery("Unbalanced parentheses")
+            return node
+        return self.predicate()
+
+    def predicate(self):
+        column = self.identifier()
+        negate = False
+        if self.at_keyword("IS"):
+            self.next()
+            if self.at_keyword("NOT"):
+                self.next()
+                negate = True
+            self.keyword("NULL")
+            node = ("null", column)
+            return ("not", node) if negate else node
+
+        if self.at_keyword("NOT"):
+            self.next()
+            negate = True
+        if self.at_keyword("BETWEEN"):
+            self.next()
+            low = self.literal()
+            self.keyword("AND")
+            node = ("between", column, low, self.literal())
+        elif self.at_keyword("IN"):
+            self.next()
+            if self.next() != ("punct", "("):
+                raise UnsupportedQuery("Expected ( after IN")
+            values = [self.literal()]
+            while self.peek() == ("punct", ","):
+                self.next()
+                values.append(self.literal())
+            if self.next() != ("punct", ")"):
+                raise UnsupportedQuery("Expected ) after IN list")
+            node = ("in", column, values)
+        elif self.at_keyword("LIKE"):
+            self.next()
+            kind, pattern = self.next()
+            if kind != "string":
+                raise UnsupportedQuery("LIKE needs a string pattern")
+            node = ("like", column, pattern)
+        elif not negate and self.peek()[0] == "op":
+            op = self.next()[1]
+            node = ("cmp", column, op, self.literal())
+        else:
+            raise UnsupportedQuery("Unsupported predicate")
+        return ("not", node) if negate else node
+
+
+def parse_adql(adql):
+    return _Parser(_tokenize(adql)).parse()
+
+
+# ---------------------------------------------------------------------------
+# Evaluation (logika tiga nilai SQL: (true, unknown) per baris)
+# ---------------------------------------------------------------------------
+
+class _Evaluator:
+    def __init__(self, table):
+        self.table = table
+        self.names = {name.lower(): name for name in table.columns}
+
+    def resolve(self, column):
+        name = self.names.get(column.lower())
+        if name is None:
+            raise UnsupportedQuery(f"Unknown column {column}")
+        if self.table.kind(name) == "json":
+            raise UnsupportedQuery(f"Column {column} can't be evaluated locally")
+        return name
+
+    def column(self, column, literal=None):
+        name = self.resolve(column)
+        data, mask = self.table.column(name)
+        if literal is not None:
+            numeric = self.table.kind(name) in _NUMERIC_KINDS
+            if numeric != isinstance(literal, (int, float)):
+                raise UnsupportedQuery(f"Type mismatch on {column}")
+        return np.asarray(data), np.asarray(mask)
+
+    def evaluate(self, node):
+        op = node[0]
+        if op == "and":
+            (at, au), (bt, bu) = self.evaluate(node[1]), self.evaluate(node[2])
+            false = (~at & ~au) | (~bt & ~bu)
+            return at & bt, (au | bu) & ~false
+        if op == "or":
+            (at, au), (bt, bu) = self.evaluate(node[1]), self.evaluate(node[2])
+            true = at | bt
+            return true, (au | bu) & ~true
+        if op == "not":
+            t, u = self.evaluate(node[1])
+            return ~t & ~u, u
+        if op == "null":
+            _, mask = self.column(node[1])
+            return mask.copy(), np.zeros(len(mask), dtype=bool)
+
+        if op == "cmp":
+            data, mask = self.column(node[1], node[3])
+            result = _COMPARATORS[node[2]](data, node[3])
+        elif op == "between":
+            data, mask = self.column(node[1], node[2])
+            self.column(node[1], node[3])
+            result = (data >= node[2]) & (data <= node[3])
+        elif op == "in":
+            data, mask = self.column(node[1], node[2][0])
+            for value in node[2][1:]:
+                self.column(node[1], value)
+            result = np.isin(data, node[2])
+        elif op == "like":
+            data, mask = self.column(node[1], node[2])
+            result = _like(data, node[2])
+        else:
+            raise UnsupportedQuery(f"Unknown node {op}")
+        return result & ~mask, mask.copy()
+
+    def sort_keys(self, order, indices):
+        """
+        Build np.lexsort keys (last = primary). NULLs sort last for ASC and
+        first for DESC, like the archive's Oracle backend.
+        """
+        keys = []
+        for column, direction in reversed(order):
+            data, mask = self.column(column)
+            values, nulls = data[indices], mask[indices]
+            if direction == "DESC":
+                if self.table.kind(self.resolve(column)) == "str":
+                    values = -np.unique(values, return_inverse=True)[1]
+                else:
+                    values = -values.astype(np.float64)
+                keys.extend([values, ~nulls])
+            else:
+                keys.extend([values, nulls])
+        return keys
+
+
+def _like(data, pattern):
+    if "_" not in pattern:
+        inner = pattern.strip("%")
+        if "%" not in inner:
+            starts, ends = pattern.startswith("%"), pattern.endswith("%")
+            if starts and ends:
+                return np.char.find(data, inner) >= 0
+            if ends:
+                return np.char.startswith(data, inner)
+            if starts:
+                return np.char.endswith(data, inner)
+            return data == inner
+    regex = re.compile("".join(
+        ".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern
+    ), re.DOTALL)
+    return np.fromiter((regex.fullmatch(value) is not None for value in data.tolist()), dtype=bool, count=len(data))
+
+
+# ---------------------------------------------------------------------------
+# Sumber data lokal
+# ---------------------------------------------------------------------------
+
+_sources = {}
+_sources_lock = threading.Lock()
+_filling = set()
+
+
+def _source_query(table):
+    return f"SELECT * FROM {table}"
+
+
+for _table in LOCAL_TABLES:
+    register_disk_query(_source_query(_table))
+
+
+def _fill_source(table):
+    query = _source_query(table)
+    try:
+        if serve_from_mirror() and mirror_ready(table):
+            fill_disk(query, loader=lambda: mirror_find(table))
+        else:
+            fill_disk(query, timeout=SOURCE_FILL_TIMEOUT)
+    except Exception as e:
+        print(f"❌ Local ADQL source fill failed for {table}: {e}")
+    finally:
+        with _sources_lock:
+            _filling.discard(table)
+            _sources.pop(table, None)
+
+
+def local_source(table):
+    """
+    Return the memory-mapped full copy of a local table, or None while it
+    is not on disk yet (a background fill is started in that case).
+    """
+    now = time.time()
+    with _sources_lock:
+        cached = _sources.get(table)
+        if cached and now - cached[1] < SOURCE_CHECK_INTERVAL:
+            return cached[0]
+    source = disk_table(_source_query(table))
+    with _sources_lock:
+        _sources[table] = (source, now)
+        if source is None and table not in _filling:
+            _filling.add(table)
+            threading.Thread(target=_fill_source, args=(table,), name=f"adql-fill-{table}", daemon=True).start()
+    return source
+
+
+def run_local(adql):
+    """
+    Answer `adql` from local data. Returns the rows (TAP JSON shape) or
+    None when the query is outside the supported subset or the table is
+    not available locally.
+    """
+    try:
+        query = parse_adql(adql)
+    except UnsupportedQuery:
+        return None
+    if query["table"] not in LOCAL_TABLES:
+        return None
+    source = local_source(query["table"])
+    if source is None:
+        return None
+
+    try:
+        evaluator = _Evaluator(source)
+        columns = source.columns if query["columns"] is None else [evaluator.resolve(c) for c in query["columns"]]
+        if query["where"] is None:
+            indices = np.arange(source.nrows)
+        else:
+            indices = np.flatnonzero(evaluator.evaluate(query["where"])[0])
+        if query["order"] and len(indices):
+            indices = indices[np.lexsort(evaluator.sort_keys(query["order"], indices))]
+        if query["top"] is not None:
+            indices = indices[:query["top"]]
+        return source.take(columns, indices)
+    except UnsupportedQuery:
+        return None
+    except Exception as e:
+        print(f"⚠️ Local ADQL evaluation failed, using TAP: {e}")
+        return None
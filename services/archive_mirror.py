@@ -0,0 +1,347 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+import requests
+from extensions import mongo
+from services.tap_client import tap_query_json
+from services.tap_cache import cached_tap_query, cached_at
+
+# Tabel arsip NASA yang di-mirror ke MongoDB.
+#   collection : nama collection Mongo
+#   key        : kolom yang mengidentifikasi satu baris (unique index)
+#   updated    : kolom tanggal update per baris untuk sync incremental
+#                (None = selalu full refresh)
+#   indexes    : kolom yang dipakai untuk filter/sort di route
+MIRROR_TABLES = {
+    "pscomppars": {
+        # Bukan "exoplanets": collection itu dikelola admin (ExoplanetAdminView)
+        "collection": "archive_pscomppars",
+        "key": ["pl_name"],
+        "updated": "rowupdate",
+        "indexes": ["pl_orbper", "hostname", "discoverymethod", "disc_year"],
+    },
+    "toi": {
+        "collection": "archive_toi",
+        "key": ["toi"],
+        "updated": "rowupdate",
+        "indexes": ["tid", "st_teff", "pl_orbper"],
+    },
+    "cumulative": {
+        "collection": "archive_cumulative",
+        "key": ["kepoi_name"],
+        "updated": None,
+        "indexes": ["kepid", "koi_disposition", "koi_period"],
+    },
+    "k2pandc": {
+        "collection": "archive_k2pandc",
+        "key": ["pl_name", "pl_refname"],
+        "updated": "rowupdate",
+        "indexes": ["hostname", "pl_orbper"],
+    },
+    "keplernames": {
+        "collection": "archive_keplernames",
+        "key": ["kepid", "koi_name"],
+        "updated": None,
+        "indexes": ["kepler_name", "pl_name"],
+    },
+    "k2names": {
+        "collection": "archive_k2names",
+        "key": ["epic_id", "pl_name"],
+        "updated": None,
+        "indexes": ["k2_name", "pl_name"],
+    },
+    "stellarhosts": {
+        "collection": "archive_stellarhosts",
+        "key": ["hostname", "st_refname"],
+        "updated": "rowupdate",
+        "indexes": ["tic_id", "gaia_id", "cb_flag"],
+    },
+}
+
+SYNC_STATE_COLLECTION = "archive_sync_state"
+SYNC_BATCH_SIZE = 1000
+FULL_SYNC_MAX_AGE = timedelta(days=int(os.getenv("ARCHIVE_FULL_SYNC_DAYS", "7")))
+SYNC_TIMEOUT = 300
+
+_SELECT_RE = re.compile(r"^\s*SELECT\s+(?:DISTINCT\s+)?(?:TOP\s+\d+\s+)?(.*?)\s+FROM\s", re.IGNORECASE | re.DOTALL)
+
+
+def serve_from_mirror():
+    return os.getenv("SERVE_FROM_MIRROR", "false").lower() in ("1", "true", "yes")
+
+
+def _collection(table):
+    return mongo.db[MIRROR_TABLES[table]["collection"]]
+
+
+def _state_collection():
+    return mongo.db[SYNC_STATE_COLLECTION]
+
+
+def ensure_mirror_indexes(table):
+    spec = MIRROR_TABLES[table]
+    collection = _collection(table)
+    collection.create_index([(field, ASCENDING) for field in spec["key"]], unique=True, name="mirror_key")
+    for field in spec["indexes"]:
+        collection.create_index([(field, ASCENDING)])
+    if spec["updated"]:
+        collection.create_index([(spec["updated"], DESCENDING)])
+
+
+def _upsert_rows(table, rows, sync_id):
+    spec = MIRROR_TABLES[table]
+    collection = _collection(table)
+    written = 0
+    for start in range(0, len(rows), SYNC_BATCH_SIZE):
+        ops = []
+        for row in rows[start:start + SYNC_BATCH_SIZE]:
+            key = {field: row.get(field) for field in spec["key"]}
+            ops.append(ReplaceOne(key, dict(row, _sync_id=sync_id), upsert=True))
+        if ops:
+            result = collection.bulk_write(ops, ordered=False)
+            written += result.upserted_count + result.modified_count
+    return written
+
+
+def _retire_collection(table, old_collection):
+    """
+    Clean up after a table's mirror moved to another collection: drop the
+    unique mirror index and the mirrored rows (documents carrying a
+    _sync_id) from the old one, leaving any other documents untouched.
+    """
+    collection = mongo.db[old_collection]
+    if "mirror_key" in collection.index_information():
+        collection.drop_index("mirror_key")
+    removed = collection.delete_many({"_sync_id": {"$exists": True}}).deleted_count
+    print(f"🧹 Mirror of {table} moved from {old_collection}: removed {removed} mirrored rows there")
+
+
+def sync_table(table, full=False):
+    """
+    Mirror one archive table into Mongo.
+
+    Incremental syncs only pull rows whose update column is on or after
+    the newest value already mirrored. A full sync re-reads the table and
+    removes rows that disappeared upstream.
+    """
+    spec = MIRROR_TABLES[table]
+    ensure_mirror_indexes(table)
+    state = _state_collection().find_one({"_id": table}) or {}
+    if state.get("collection") and state["collection"] != spec["collection"]:
+        _retire_collection(table, state["collection"])
+        state = {}
+
+    last_full = state.get("last_full_sync")
+    if not spec["updated"] or not state.get("last_updated_value"):
+        full = True
+    elif last_full is None or datetime.utcnow() - last_full > FULL_SYNC_MAX_AGE:
+        full = True
+
+    sync_id = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
+    started = time.time()
+
+    rows = None
+    if not full:
+        query = f"SELECT * FROM {table} WHERE {spec['updated']} >= '{state['last_updated_value']}'"
+        try:
+            rows = tap_query_json(query, timeout=SYNC_TIMEOUT)
+        except requests.exceptions.HTTPError as e:
+            print(f"⚠️ Incremental sync for {table} failed, falling back to full sync: {e}")
+            full = True
+    if full:
+        rows = tap_query_json(f"SELECT * FROM {table}", timeout=SYNC_TIMEOUT)
+
+    written = _upsert_rows(table, rows, sync_id)
+    removed = 0
+    if full and rows:
+        removed = _collection(table).delete_many({"_sync_id": {"$exists": True, "$ne": sync_id}}).deleted_count
+
+    update = {
+        "table": table,
+        "collection": spec["collection"],
+        "synced_at": datetime.utcnow(),
+        "rows_fetched": len(rows),
+        "rows_written": written,
+        "rows_removed": removed,
+        "mode": "full" if full else "incremental",
+        "duration_s": round(time.time() - started, 2),
+    }
+    if spec["updated"]:
+        values = [row.get(spec["updated"]) for row in rows if row.get(spec["updated"])]
+        if values:
+            update["last_updated_value"] = max(values + [state.get("last_updated_value") or ""])
+    if full:
+        update["last_full_sync"] = update["synced_at"]
+    _state_collection().update_one({"_id": table}, {"$set": update}, upsert=True)
+    _ready_cache.pop(table, None)
+    print(f"✅ Synced {table} → {spec['collection']} ({update['mode']}, {len(rows)} rows, {removed} removed)")
+    return update
+
+
+def sync_all(tables=None, full=False):
+    results = {}
+    for table in tables or MIRROR_TABLES:
+        try:
+            results[table] = sync_table(table, full=full)
+        except Exception as e:
+            print(f"❌ Sync failed for {table}: {e}")
+            results[table] = {"table": table, "error": str(e)}
+    return results
+
+
+def get_sync_status():
+    return {doc["_id"]: doc for doc in _state_collection().find({"_id": {"$in": list(MIRROR_TABLES)}})}
+
+
+# ---------------------------------------------------------------------------
+# Read path
+# ---------------------------------------------------------------------------
+
+_ready_cache = {}
+READY_CHECK_TTL = 60
+
+
+def _synced_at(table):
+    """
+    Return the last successful sync time of a mirrored table (or None),
+    read at most once per READY_CHECK_TTL seconds per worker.
+    """
+    if table not in MIRROR_TABLES:
+        return None
+    cached = _ready_cache.get(table)
+    if cached and time.time() - cached[1] < READY_CHECK_TTL:
+        return cached[0]
+    try:
+        # State milik collection lama (sebelum mirror dipindah) belum dihitung
+        state = _state_collection().find_one(
+            {"_id": table, "synced_at": {"$exists": True}, "collection": MIRROR_TABLES[table]["collection"]},
+            {"synced_at": 1},
+        )
+        synced_at = state["synced_at"] if state else None
+    except Exception as e:
+        print(f"⚠️ Mirror readiness check failed for {table}: {e}")
+        synced_at = None
+    _ready_cache[table] = (synced_at, time.time())
+    return synced_at
+
+
+def mirror_ready(table):
+    """
+    True once the table has completed at least one sync.
+    """
+    return _synced_at(table) is not None
+
+
+def select_columns(query):
+    """
+    Return the column list of a simple ADQL SELECT, or None for SELECT *.
+    """
+    match = _SELECT_RE.match(query)
+    if not match:
+        return None
+    columns = [col.strip() for col in match.group(1).split(",")]
+    if columns == ["*"]:
+        return None
+    return columns
+
+
+def iter_mirror(table, columns=None, mongo_filter=None, sort=None, limit=0):
+    """
+    Iterate mirrored rows lazily, shaped like the TAP JSON rows.
+    """
+    projection = {"_id": 0}
+    if columns:
+        projection.update({col: 1 for col in columns})
+    else:
+        projection["_sync_id"] = 0
+    cursor = _collection(table).find(mongo_filter or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    for row in cursor:
+        if columns:
+            # Kolom yang tidak ada di dokumen tetap dikirim sebagai null, sama seperti TAP
+            row = {col: row.get(col) for col in columns}
+        yield row
+
+
+def mirror_find(table, columns=None, mongo_filter=None, sort=None, limit=0):
+    return list(iter_mirror(table, columns, mongo_filter, sort, limit))
+
+
+def read_table(query, table, mongo_filter=None, sort=None, limit=0, timeout=None):
+    """
+    Serve an archive query from the Mongo mirror when SERVE_FROM_MIRROR is
+    on and the table has been synced, otherwise from the TAP result cache.
+    """
+    if serve_from_mirror() and mirror_ready(table):
+        return mirror_find(table, select_columns(query), mongo_filter, sort, limit)
+    return cached_tap_query(query, timeout=timeout)
+
+
+def data_timestamp(query, table):
+    """
+    Return when the data behind an archive query was last fetched (epoch
+    seconds): the mirror sync time or the cache fill time, None if unknown.
+    """
+    synced_at = _synced_at(table) if serve_from_mirror() else None
+    if synced_at is not None:
+        # synced_at disimpan sebagai datetime.utcnow() (naive UTC)
+        return synced_at.replace(tzinfo=timezone.utc).timestamp()
+    return cached_at(query)
+
+
+# ---------------------------------------------------------------------------
+# Scheduled job
+# ---------------------------------------------------------------------------
+
+SYNC_LOCK_ID = "__sync_lock__"
+
+
+def _acquire_sync_lock(lease_seconds):
+    now = datetime.utcnow()
+    try:
+        _state_collection().find_one_and_update(
+            {"_id": SYNC_LOCK_ID, "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + timedelta(seconds=lease_seconds), "pid": os.getpid()}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # Dokumen lock ada dan masih dipegang worker lain
+        return False
+
+
+def _release_sync_lock():
+    _state_collection().update_one({"_id": SYNC_LOCK_ID, "pid": os.getpid()}, {"$set": {"locked_until": datetime.utcnow()}})
+
+
+def start_sync_scheduler(interval=None):
+    """
+    Run sync_all() every `interval` seconds in a daemon thread. A lease
+    document in Mongo makes sure only one worker syncs at a time.
+    """
+    interval = interval or int(os.getenv("ARCHIVE_SYNC_INTERVAL", "0"))
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            try:
+                if _acquire_sync_lock(lease_seconds=max(interval, SYNC_TIMEOUT * len(MIRROR_TABLES))):
+                    try:
+                        sync_all()
+                    finally:
+                        _release_sync_lock()
+            except Exception as e:
+                print(f"❌ Archive sync job failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="archive-sync", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,132 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from extensions import mongo
+
+# Audit log admin ditulis lewat antrean per worker: request cukup
+# memasukkan event ke queue, thread background menulis dengan insert_many
+# per AUDIT_BATCH_SIZE event atau setiap AUDIT_FLUSH_INTERVAL detik.
+AUDIT_LOG_ASYNC = os.getenv("AUDIT_LOG_ASYNC", "1") == "1"
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+# Backpressure: kalau queue penuh, request menunggu selama ini lalu menulis
+# sendiri secara sinkron (event audit tidak pernah dibuang)
+AUDIT_ENQUEUE_TIMEOUT = 0.5
+AUDIT_WRITE_ATTEMPTS = 3
+AUDIT_SHUTDOWN_TIMEOUT = 5.0
+AUDIT_COLLECTION = "audit_logs"
+
+
+def _collection():
+    return mongo.db[AUDIT_COLLECTION]
+
+
+class AuditWriter:
+    """
+    Bounded queue of audit events drained by one background thread.
+    """
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, interval=AUDIT_FLUSH_INTERVAL, maxsize=AUDIT_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, event):
+        try:
+            self.queue.put(event, timeout=AUDIT_ENQUEUE_TIMEOUT)
+        except queue.Full:
+            _collection().insert_one(event)
+
+    def _take_batch(self, wait):
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        for attempt in range(1, AUDIT_WRITE_ATTEMPTS + 1):
+            try:
+                _collection().insert_many(batch, ordered=False)
+                return
+            except Exception as e:
+                if attempt == AUDIT_WRITE_ATTEMPTS:
+                    print(f"❌ Audit log write failed, dropped {len(batch)} events: {e}")
+                else:
+                    time.sleep(0.5 * attempt)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch(self.interval)
+            if batch:
+                with self._write_lock:
+                    self._write(batch)
+
+    def flush(self):
+        """
+        Synchronously write everything currently queued.
+        """
+        with self._write_lock:
+            while True:
+                batch = self._take_batch(0)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def close(self, timeout=AUDIT_SHUTDOWN_TIMEOUT):
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """
+    Return this process's AuditWriter, (re)created after a fork so every
+    gunicorn worker has its own queue and thread.
+    """
+    global _writer, _writer_pid
+    pid = os.getpid()
+    if _writer is None or _writer_pid != pid:
+        with _writer_lock:
+            if _writer is None or _writer_pid != pid:
+                _writer = AuditWriter()
+                _writer_pid = pid
+    return _writer
+
+
+def record_audit_event(event):
+    if not AUDIT_LOG_ASYNC:
+        _collection().insert_one(event)
+        return
+    get_audit_writer().put(event)
+
+
+def flush_audit_log():
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.flush()
+
+
+@atexit.register
+def _shutdown():
+    # Worker berhenti dengan normal: tulis sisa antrean sebelum keluar
+    if _writer is not None and _writer_pid == os.getpid():
+        try:
+            _writer.close()
+        except Exception as e:
+            print(f"❌ Audit log flush on shutdown failed: {e}")
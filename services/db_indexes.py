@@ -0,0 +1,136 @@
+import os
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from extensions import mongo
+
+# Index wajib untuk collection aplikasi (mirror arsip punya index sendiri
+# di services/archive_mirror.py). Diterapkan idempoten saat startup atau via
+# `flask --app app ensure-indexes`.
+#   keys    : pasangan (field, arah) seperti create_index
+#   options : opsi create_index (unique, expireAfterSeconds, ...)
+AUDIT_LOG_RETENTION_DAYS = int(os.getenv("AUDIT_LOG_RETENTION_DAYS", "365"))  # 0 = simpan selamanya
+TAP_JOB_RETENTION_DAYS = int(os.getenv("TAP_JOB_RETENTION_DAYS", "7"))  # 0 = simpan selamanya
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "1") == "1"
+
+def _ttl_options(days):
+    return {"expireAfterSeconds": days * 86400} if days > 0 else {}
+
+
+_audit_options = _ttl_options(AUDIT_LOG_RETENTION_DAYS)
+
+APP_INDEXES = {
+    "users": [
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "options": {"unique": True}},
+        {"name": "username_asc", "keys": [("username", ASCENDING)], "options": {}},  # pencarian prefix
+    ],
+    "contacts": [
+        {"name": "timestamp_desc", "keys": [("timestamp", DESCENDING)], "options": {}},
+    ],
+    "audit_logs": [
+        # Satu index untuk sort audit trail sekaligus TTL log lama
+        # (Mongo tidak mengizinkan dua index dengan key yang sama)
+        {"name": "timestamp_ttl", "keys": [("timestamp", DESCENDING)], "options": _audit_options},
+    ],
+    "tap_jobs": [
+        # Job async gateway (services/tap_gateway.py) dihapus setelah masa simpan
+        {"name": "created_at_ttl", "keys": [("created_at", ASCENDING)], "options": _ttl_options(TAP_JOB_RETENTION_DAYS)},
+    ],
+}
+
+# Query representatif dari route, dicek dengan explain() untuk laporan scan.
+#   (label, collection, filter(), sort, limit)
+EXPLAIN_QUERIES = [
+    ("signin: find_user_by_email", "users", lambda: {"email": "probe@example.com"}, None, 1),
+    ("admin stats: contacts last 7 days", "contacts",
+     lambda: {"timestamp": {"$gte": datetime.utcnow() - timedelta(days=7)}}, None, 0),
+    ("audit trail: latest 100 logs", "audit_logs", lambda: {}, [("timestamp", DESCENDING)], 100),
+]
+
+
+def _apply_index(collection, spec, existing):
+    name, keys, options = spec["name"], spec["keys"], spec["options"]
+    current = existing.get(name)
+    if current is None:
+        collection.create_index(keys, name=name, **options)
+        return "created"
+    if [(field, int(direction)) for field, direction in current["key"]] != keys:
+        return "conflict: an index with this name has different keys"
+    ttl = options.get("expireAfterSeconds")
+    if ttl is not None and current.get("expireAfterSeconds") != ttl:
+        # TTL bisa diubah di tempat tanpa rebuild index
+        mongo.db.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": ttl})
+        return "updated"
+    if ttl is None and "expireAfterSeconds" in current:
+        return "conflict: TTL is disabled but the existing index still expires documents"
+    return "exists"
+
+
+def ensure_indexes():
+    """
+    Create the indexes in APP_INDEXES that are missing. Returns
+    {collection: [{"name", "status"}]}; a failure on one index (e.g.
+    duplicate emails blocking the unique index) is reported, not raised.
+    """
+    report = {}
+    for collection_name, specs in APP_INDEXES.items():
+        collection = mongo.db[collection_name]
+        existing = collection.index_information()
+        results = []
+        for spec in specs:
+            try:
+                status = _apply_index(collection, spec, existing)
+            except OperationFailure as e:
+                status = f"error: {e.details.get('errmsg', str(e)) if e.details else e}"
+            results.append({"name": spec["name"], "status": status})
+        report[collection_name] = results
+    return report
+
+
+def _plan_stages(plan):
+    # Telusuri winning plan (classic: inputStage(s), SBE: queryPlan)
+    if not plan:
+        return
+    yield plan
+    for child in ("queryPlan", "inputStage"):
+        yield from _plan_stages(plan.get(child))
+    for stage in plan.get("inputStages", []):
+        yield from _plan_stages(stage)
+
+
+def scan_report():
+    """
+    explain() each query in EXPLAIN_QUERIES and report whether the winning
+    plan is an index scan or a full collection scan.
+    """
+    report = []
+    for label, collection_name, query_filter, sort, limit in EXPLAIN_QUERIES:
+        cursor = mongo.db[collection_name].find(query_filter()).limit(limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        except OperationFailure as e:
+            report.append({"query": label, "collection": collection_name, "error": str(e)})
+            continue
+        stages = list(_plan_stages(plan))
+        indexes = sorted({stage["indexName"] for stage in stages if stage.get("indexName")})
+        report.append({
+            "query": label,
+            "collection": collection_name,
+            "collscan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+            "indexes": indexes,
+        })
+    return report
+
+
+def ensure_indexes_on_startup():
+    if not ENSURE_INDEXES_ON_STARTUP:
+        return
+    try:
+        for collection_name, results in ensure_indexes().items():
+            for result in results:
+                if result["status"] != "exists":
+                    print(f"🗂️ Index {collection_name}.{result['name']}: {result['status']}")
+    except Exception as e:
+        print(f"❌ Ensuring MongoDB indexes failed: {e}")
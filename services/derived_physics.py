@@ -0,0 +1,149 @@
+import numpy as np
+from services.tap_client import normalize_query
+from services.tap_cache import cached_call, ttl_for_query
+from services.archive_mirror import read_table, data_timestamp
+
+# Kolom turunan yang dihitung server dari kolom pscomppars, sekali per
+# refresh data untuk seluruh tabel (vektor NumPy), bukan per planet di JS.
+#   nama kolom -> kolom input yang dibutuhkan
+DERIVED_FIELDS = {
+    "pl_orbsmax_est": ["pl_orbper", "st_mass"],                       # AU, hukum Kepler III
+    "pl_insol_est": ["pl_orbper", "st_mass", "st_rad", "st_teff"],    # fluks relatif Bumi
+    "pl_eqt_est": ["pl_orbper", "st_mass", "st_rad", "st_teff"],      # K, albedo Bond 0.3
+    "pl_dens_est": ["pl_radj"],                                       # g/cm^3, massa dari relasi M-R
+    "pl_hz_flag": ["pl_orbper", "st_mass", "st_rad", "st_teff"],      # di zona layak huni konservatif
+}
+DERIVED_KEY = "pl_name"
+
+T_SUN = 5772.0
+R_SUN_AU = 0.00465047
+R_JUP_IN_EARTH = 11.209
+M_JUP_IN_EARTH = 317.83
+RHO_EARTH = 5.514
+BOND_ALBEDO = 0.3
+
+# Relasi massa-radius Chen & Kipping (2017): R = C * M^S (satuan Bumi)
+TERRAN_EXPONENT = 0.279
+NEPTUNIAN_C, NEPTUNIAN_EXPONENT = 0.80811, 0.589
+TERRAN_MAX_RADIUS = 2.04 ** TERRAN_EXPONENT
+NEPTUNIAN_MAX_RADIUS = NEPTUNIAN_C * 132 ** NEPTUNIAN_EXPONENT
+
+# Batas zona layak huni konservatif Kopparapu et al. (2013), 2600-7200 K:
+# Seff = Seff_sun + a*T + b*T^2 + c*T^3 + d*T^4 dengan T = Teff - 5780
+HZ_INNER = (1.0512, 1.3242e-4, 1.5418e-8, -7.9895e-12, -1.8328e-15)   # runaway greenhouse
+HZ_OUTER = (0.3438, 5.8942e-5, 1.6558e-9, -3.0045e-12, -5.2983e-16)   # maximum greenhouse
+HZ_TEFF_RANGE = (2600.0, 7200.0)
+
+
+def _column(rows, name):
+    return np.array([row.get(name) if row.get(name) is not None else np.nan for row in rows], dtype=np.float64)
+
+
+def _hz_flux(coefficients, teff):
+    s_sun, a, b, c, d = coefficients
+    t = teff - 5780.0
+    return s_sun + a * t + b * t ** 2 + c * t ** 3 + d * t ** 4
+
+
+def compute_columns(rows):
+    """
+    Compute every derived field for `rows` at once. Returns
+    {field: numpy array}; NaN marks values whose inputs are missing.
+    """
+    period, st_mass, st_rad, st_teff, radius_j = (
+        _column(rows, name) for name in ("pl_orbper", "st_mass", "st_rad", "st_teff", "pl_radj")
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        semi_major = np.cbrt(st_mass * (period / 365.25) ** 2)
+        luminosity = st_rad ** 2 * (st_teff / T_SUN) ** 4
+        insolation = luminosity / semi_major ** 2
+        eq_temp = st_teff * np.sqrt(st_rad * R_SUN_AU / (2 * semi_major)) * (1 - BOND_ALBEDO) ** 0.25
+
+        radius = radius_j * R_JUP_IN_EARTH
+        mass = np.where(
+            radius <= TERRAN_MAX_RADIUS,
+            radius ** (1 / TERRAN_EXPONENT),
+            np.where(radius <= NEPTUNIAN_MAX_RADIUS, (radius / NEPTUNIAN_C) ** (1 / NEPTUNIAN_EXPONENT), M_JUP_IN_EARTH),
+        )
+        density = RHO_EARTH * mass / radius ** 3
+
+        in_range = (st_teff >= HZ_TEFF_RANGE[0]) & (st_teff <= HZ_TEFF_RANGE[1]) & ~np.isnan(insolation)
+        in_hz = (insolation <= _hz_flux(HZ_INNER, st_teff)) & (insolation >= _hz_flux(HZ_OUTER, st_teff))
+    hz_flag = np.where(in_range, in_hz.astype(np.float64), np.nan)
+
+    return {
+        "pl_orbsmax_est": semi_major,
+        "pl_insol_est": insolation,
+        "pl_eqt_est": eq_temp,
+        "pl_dens_est": density,
+        "pl_hz_flag": hz_flag,
+    }
+
+
+def _to_values(field, array):
+    if field == "pl_hz_flag":
+        return [None if np.isnan(v) else bool(v) for v in array.tolist()]
+    return [None if not np.isfinite(v) else round(v, 6) for v in array.tolist()]
+
+
+def derived_rows(rows, fields=None):
+    """
+    Return one dict of derived values per row (same order as `rows`).
+    """
+    fields = fields or list(DERIVED_FIELDS)
+    columns = compute_columns(rows)
+    values = [_to_values(field, columns[field]) for field in fields]
+    return [dict(zip(fields, row_values)) for row_values in zip(*values)] if rows else []
+
+
+def derived_inputs(fields):
+    inputs = [DERIVED_KEY]
+    for field in fields:
+        inputs.extend(column for column in DERIVED_FIELDS[field] if column not in inputs)
+    return inputs
+
+
+def derived_fields_for(columns):
+    """
+    Derived fields whose inputs are all among a table's `columns`.
+    """
+    return [field for field, inputs in DERIVED_FIELDS.items() if set(inputs) <= set(columns)]
+
+
+def derived_map(query, table):
+    """
+    {pl_name: {derived fields}} for a whole table query, computed once per
+    data version (cache fill or mirror sync) and shared by all requests.
+    """
+    version = data_timestamp(query, table)
+    if version is None:
+        return None
+    key = f"derived:{normalize_query(query)}@{version}"
+
+    def load():
+        rows = read_table(query, table)
+        return {row.get(DERIVED_KEY): values for row, values in zip(rows, derived_rows(rows))}
+
+    return cached_call(key, load, ttl_for_query(query))
+
+
+def add_derived(rows, fields, query=None, table=None):
+    """
+    Return copies of `rows` with the requested derived fields, using the
+    precomputed table-wide values when available and computing the rest
+    directly. (Cached rows are shared, so they are never modified.)
+    """
+    rows = [dict(row) for row in rows]
+    precomputed = derived_map(query, table) if query else None
+    missing = []
+    for index, row in enumerate(rows):
+        values = precomputed.get(row.get(DERIVED_KEY)) if precomputed else None
+        if values is None:
+            missing.append(index)
+        else:
+            row.update({field: values[field] for field in fields})
+    if missing:
+        computed = derived_rows([rows[i] for i in missing], fields)
+        for index, values in zip(missing, computed):
+            rows[index].update(values)
+    return rows
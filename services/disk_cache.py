@@ -0,0 +1,401 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock hanya berlaku dalam satu proses
+    fcntl = None
+
+# Tier cache di disk, dipakai bersama oleh semua worker di host yang sama.
+# Setiap hasil query disimpan kolom per kolom sebagai file .npy yang dibuka
+# dengan mmap, jadi page cache OS hanya menyimpan satu salinan data dan
+# worker yang baru restart langsung "hangat".
+DISK_CACHE_ENABLED = os.getenv("TAP_DISK_CACHE", "true").lower() in ("1", "true", "yes")
+DISK_CACHE_DIR = os.getenv("TAP_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "exoplanet-tap-cache"))
+DISK_CACHE_STALE_GRACE = int(os.getenv("TAP_CACHE_STALE_GRACE", str(24 * 3600)))
+# Batas total ukuran tier disk; entri yang paling lama tidak dibaca dibuang
+DISK_CACHE_MAX_BYTES = int(os.getenv("TAP_DISK_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+ROW_BATCH = 1000
+OLD_VERSION_GRACE = 3600
+# Waktu akses (mtime file meta) diperbarui paling sering sekali per interval ini
+TOUCH_INTERVAL = 60
+FILL_LOCK_SUFFIX = ".fill.lock"
+
+# Lock fill per key: thread di worker ini dan worker lain di host yang sama
+# menunggu fill key yang sama, tapi tidak pernah menunggu tabel lain
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def _entry_base(key):
+    return os.path.join(DISK_CACHE_DIR, hashlib.sha256(key.encode()).hexdigest())
+
+
+def _column_kind(values):
+    """
+    Pick a storage kind for a column: bool, int, float, str or json.
+    """
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds.add("bool")
+        elif isinstance(value, int):
+            kinds.add("int")
+        elif isinstance(value, float):
+            kinds.add("float")
+        elif isinstance(value, str):
+            kinds.add("str")
+        else:
+            return "json"
+    if not kinds:
+        return "float"
+    if kinds == {"bool"}:
+        return "bool"
+    if kinds <= {"int"}:
+        return "int"
+    if kinds <= {"int", "float"}:
+        return "float"
+    if kinds == {"str"}:
+        return "str"
+    return "json"
+
+
+def _encode_column(values, kind):
+    mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+    if kind == "bool":
+        data = np.array([bool(v) if v is not None else False for v in values], dtype=bool)
+    elif kind == "int":
+        data = np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+    elif kind == "float":
+        data = np.array([v if v is not None else np.nan for v in values], dtype=np.float64)
+    else:
+        data = np.array([v if v is not None else "" for v in values], dtype=str)
+    return data, mask
+
+
+class DiskTable:
+    """
+    A cached query result backed by memory-mapped column files.
+    """
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.columns = meta["columns"]
+        self.nrows = meta["nrows"]
+        self._data = {}
+        self._masks = {}
+
+    def _load(self, column):
+        # Kolom dibuka saat pertama dipakai; tabel lebar tidak perlu membuka
+        # ratusan file hanya untuk membaca beberapa kolom.
+        if column in self._data:
+            return
+        index = self.columns.index(column)
+        if self.meta["kinds"][column] == "json":
+            with open(os.path.join(self.path, f"{index}.json")) as fh:
+                self._data[column] = json.load(fh)
+            self._masks[column] = None
+        else:
+            self._masks[column] = np.load(os.path.join(self.path, f"{index}.mask.npy"), mmap_mode="r")
+            self._data[column] = np.load(os.path.join(self.path, f"{index}.npy"), mmap_mode="r")
+
+    def kind(self, column):
+        return self.meta["kinds"][column]
+
+    @property
+    def stored_at(self):
+        return self.meta["stored_at"]
+
+    def _column_slice(self, column, start, stop):
+        self._load(column)
+        data = self._data[column][start:stop]
+        mask = self._masks[column]
+        if mask is None:
+            return list(data)
+        values = data.tolist()
+        chunk_mask = mask[start:stop]
+        if chunk_mask.any():
+            for i in np.flatnonzero(chunk_mask):
+                values[i] = None
+        return values
+
+    def iter_rows(self, batch=ROW_BATCH):
+        """
+        Yield row dicts a batch at a time; only one batch is materialized.
+        """
+        for start in range(0, self.nrows, batch):
+            stop = min(start + batch, self.nrows)
+            columns = [self._column_slice(column, start, stop) for column in self.columns]
+            for values in zip(*columns):
+                yield dict(zip(self.columns, values))
+
+    def to_rows(self):
+        return list(self.iter_rows())
+
+    def column(self, name):
+        """
+        Return a column as (memory-mapped data, null mask) for vectorized use.
+        """
+        self._load(name)
+        return self._data[name], self._masks[name]
+
+    def take(self, columns, indices):
+        """
+        Return the rows at `indices` (in that order) restricted to `columns`.
+        """
+        values = []
+        for column in columns:
+            self._load(column)
+            data, mask = self._data[column], self._masks[column]
+            if mask is None:
+                values.append([data[i] for i in indices])
+                continue
+            picked = data[indices].tolist()
+            for i in np.flatnonzero(mask[indices]):
+                picked[i] = None
+            values.append(picked)
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def write_table(key, rows, ttl):
+    """
+    Store `rows` (list of dicts) for `key`. Returns the DiskTable, or None
+    when the rows can't be stored column-wise.
+    """
+    if not DISK_CACHE_ENABLED or not isinstance(rows, list):
+        return None
+    if rows and not all(isinstance(row, dict) for row in rows):
+        return None
+
+    os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+    columns = list(rows[0].keys()) if rows else []
+    base = _entry_base(key)
+    tmp_path = tempfile.mkdtemp(prefix=".tmp-", dir=DISK_CACHE_DIR)
+    try:
+        kinds = {}
+        for index, column in enumerate(columns):
+            values = [row.get(column) for row in rows]
+            kind = _column_kind(values)
+            kinds[column] = kind
+            if kind == "json":
+                with open(os.path.join(tmp_path, f"{index}.json"), "w") as fh:
+                    json.dump(values, fh)
+                continue
+            data, mask = _encode_column(values, kind)
+            np.save(os.path.join(tmp_path, f"{index}.npy"), data)
+            np.save(os.path.join(tmp_path, f"{index}.mask.npy"), mask)
+
+        # Setiap versi punya direktori sendiri yang tidak pernah diubah;
+        # file meta (diganti secara atomik) menunjuk ke versi terbaru, jadi
+        # reader yang masih memakai versi lama tidak pernah melihat file
+        # yang setengah jadi atau tertukar. Versi lama dihapus oleh prune().
+        # Yang ditambahkan ke direktori versi hanya body respons terkompresi
+        # (utils/compression.py), yang ikut terhitung di budget dan terhapus
+        # bersama versinya.
+        size = _dir_bytes(tmp_path)
+        if size > DISK_CACHE_MAX_BYTES:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            print(f"⚠️ Disk cache entry for {key[:80]} exceeds TAP_DISK_CACHE_MAX_BYTES ({size} bytes), not stored")
+            return None
+        version = f"{os.path.basename(base)}.{time.time_ns()}"
+        os.replace(tmp_path, os.path.join(DISK_CACHE_DIR, version))
+        meta = {"key": key, "dir": version, "columns": columns, "kinds": kinds, "nrows": len(rows),
+                "stored_at": time.time(), "ttl": ttl, "bytes": size}
+        tmp_meta = f"{base}.meta.{os.getpid()}.tmp"
+        with open(tmp_meta, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_meta, f"{base}.meta.json")
+    except Exception as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        print(f"⚠️ Disk cache write failed for {key[:80]}: {e}")
+        return None
+    enforce_budget()
+    return DiskTable(os.path.join(DISK_CACHE_DIR, version), meta)
+
+
+def _dir_bytes(path):
+    total = 0
+    for name in os.listdir(path):
+        try:
+            total += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return total
+
+
+def _key_lock(key):
+    with _key_locks_guard:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def fill_lock(key, blocking=True):
+    """
+    Per-key lock held while a worker fetches and writes `key`, so each
+    table is fetched and parsed by only one thread on the host while
+    fills of other tables proceed independently. Yields True if the lock
+    was acquired (always, when `blocking`), False otherwise.
+    """
+    thread_lock = _key_lock(key)
+    if not thread_lock.acquire(blocking):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+        with open(_entry_base(key) + FILL_LOCK_SUFFIX, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        thread_lock.release()
+
+
+def _read_meta(key):
+    try:
+        with open(f"{_entry_base(key)}.meta.json") as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("key") == key else None
+
+
+def read_table(key):
+    """
+    Return (DiskTable, is_fresh) for `key`, or None if missing/expired.
+    """
+    if not DISK_CACHE_ENABLED:
+        return None
+    meta = _read_meta(key)
+    if meta is None:
+        return None
+    now = time.time()
+    age = now - meta["stored_at"]
+    if age > meta["ttl"] + DISK_CACHE_STALE_GRACE:
+        return None
+    _touch(f"{_entry_base(key)}.meta.json", now)
+    return DiskTable(os.path.join(DISK_CACHE_DIR, meta["dir"]), meta), age <= meta["ttl"]
+
+
+def _touch(meta_path, now):
+    # mtime file meta = waktu akses terakhir, dipakai untuk urutan LRU
+    try:
+        if now - os.path.getmtime(meta_path) > TOUCH_INTERVAL:
+            os.utime(meta_path, (now, now))
+    except OSError:
+        pass
+
+
+def stored_at(key):
+    """
+    Return when `key` was written to disk (epoch seconds), or None.
+    """
+    if not DISK_CACHE_ENABLED:
+        return None
+    meta = _read_meta(key)
+    return meta["stored_at"] if meta else None
+
+
+def prune():
+    """
+    Remove expired entries, superseded versions and leftovers from
+    interrupted writes. Superseded versions are kept for OLD_VERSION_GRACE
+    seconds so readers still holding them can finish.
+    """
+    if not os.path.isdir(DISK_CACHE_DIR):
+        return 0
+    removed = 0
+    now = time.time()
+    names = os.listdir(DISK_CACHE_DIR)
+    current = set()
+    for name in names:
+        if not name.endswith(".meta.json"):
+            continue
+        path = os.path.join(DISK_CACHE_DIR, name)
+        try:
+            with open(path) as fh:
+                meta = json.load(fh)
+            expired = now - meta["stored_at"] > meta["ttl"] + DISK_CACHE_STALE_GRACE
+        except (OSError, ValueError, KeyError):
+            meta, expired = None, True
+        if expired:
+            os.remove(path)
+            removed += 1
+        elif meta:
+            current.add(meta["dir"])
+    for name in names:
+        path = os.path.join(DISK_CACHE_DIR, name)
+        # File lock tidak pernah dihapus: worker lain mungkin sedang memegangnya
+        if name.endswith(".meta.json") or name.endswith(FILL_LOCK_SUFFIX) or name in current:
+            continue
+        try:
+            if now - os.path.getmtime(path) <= OLD_VERSION_GRACE:
+                continue
+        except OSError:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        removed += 1
+    return removed + enforce_budget()
+
+
+def enforce_budget(max_bytes=None):
+    """
+    Evict the least recently read entries until the tier (current and
+    superseded versions) fits in `max_bytes`. Returns the number evicted.
+    """
+    max_bytes = DISK_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(DISK_CACHE_DIR):
+        return 0
+    entries = []
+    total = 0
+    for name in os.listdir(DISK_CACHE_DIR):
+        path = os.path.join(DISK_CACHE_DIR, name)
+        if os.path.isdir(path):
+            total += _dir_bytes(path)
+            continue
+        if not name.endswith(".meta.json"):
+            continue
+        try:
+            with open(path) as fh:
+                meta = json.load(fh)
+            entries.append((os.path.getmtime(path), path, meta["dir"]))
+        except (OSError, ValueError, KeyError):
+            continue
+    evicted = 0
+    for _, meta_path, version in sorted(entries):
+        if total <= max_bytes:
+            break
+        version_path = os.path.join(DISK_CACHE_DIR, version)
+        size = _dir_bytes(version_path) if os.path.isdir(version_path) else 0
+        try:
+            os.remove(meta_path)
+        except OSError:
+            continue
+        shutil.rmtree(version_path, ignore_errors=True)
+        total -= size
+        evicted += 1
+    return evicted
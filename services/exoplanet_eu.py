@@ -0,0 +1,68 @@
+import os
+import threading
+import numpy as np
+import pyvo
+from services.tap_client import get_session, normalize_query
+from services.tap_cache import cached_call
+
+EU_TAP_URL = os.getenv("EU_TAP_URL", "http://voparis-tap-planeto.obspm.fr/tap")
+EU_CACHE_TTL = int(os.getenv("EU_CACHE_TTL", str(6 * 3600)))
+
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def get_eu_service():
+    """
+    Return the per-worker pyvo TAPService for Exoplanet.eu. It shares the
+    pooled HTTP session from tap_client, so capability/metadata lookups and
+    queries reuse the same keep-alive connections.
+    """
+    global _service, _service_pid
+    pid = os.getpid()
+    if _service is None or _service_pid != pid:
+        with _service_lock:
+            if _service is None or _service_pid != pid:
+                _service = pyvo.dal.TAPService(EU_TAP_URL, session=get_session())
+                _service_pid = pid
+    return _service
+
+
+def _column_values(column):
+    """
+    Convert one astropy column to a list of JSON-safe Python values in bulk:
+    masked entries and NaNs become None, bytes are decoded.
+    """
+    data = np.ma.getdata(column)
+    mask = np.ma.getmaskarray(column) if np.ma.isMaskedArray(column) or hasattr(column, "mask") else np.zeros(len(data), dtype=bool)
+
+    if data.dtype.kind == "S":
+        data = np.char.decode(data, "utf-8")
+    elif data.dtype.kind == "f":
+        mask = mask | np.isnan(data)
+
+    if not mask.any():
+        return data.tolist()
+    values = np.array(data.tolist(), dtype=object)
+    values[mask] = None
+    return values.tolist()
+
+
+def table_to_rows(table):
+    names = list(table.colnames)
+    columns = [_column_values(table[name]) for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def eu_query_rows(query):
+    results = get_eu_service().search(query)
+    return table_to_rows(results.to_table())
+
+
+def cached_eu_query(query, ttl=EU_CACHE_TTL):
+    """
+    Run an ADQL query against Exoplanet.eu through the shared result cache.
+    """
+    adql = normalize_query(query)
+    return cached_call(f"exoplanet-eu:{adql}", lambda: eu_query_rows(adql), ttl)
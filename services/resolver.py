@@ -0,0 +1,213 @@
+import os
+import re
+import time
+import bisect
+import threading
+from collections import defaultdict
+from services.archive_mirror import read_table
+
+# Resolver nama objek lintas katalog (Kepler / K2 / host bintang).
+# Index dibangun per worker dari tabel arsip yang sudah di-cache/mirror,
+# jadi lookup nama cukup satu akses dict, bukan kirim ribuan baris ke browser.
+#   source      : tabel arsip
+#   query       : kolom yang dibaca
+#   names       : kolom yang bisa dipakai untuk mencari
+RESOLVER_SOURCES = {
+    "keplernames": {
+        "query": "SELECT kepid, koi_name, kepler_name, pl_name FROM keplernames",
+        "names": ["kepid", "koi_name", "kepler_name", "pl_name"],
+    },
+    "k2names": {
+        "query": "SELECT epic_id, k2_name, pl_name FROM k2names",
+        "names": ["epic_id", "pl_name"],
+    },
+    "stellarhosts": {
+        "query": "SELECT DISTINCT hostname, sy_name, hd_name, hip_name, tic_id, gaia_id FROM stellarhosts",
+        "names": ["hostname", "sy_name", "hd_name", "hip_name", "tic_id", "gaia_id"],
+    },
+}
+RESOLVER_REFRESH = int(os.getenv("RESOLVER_REFRESH", "3600"))
+RESOLVER_LOAD_TIMEOUT = 120
+MAX_RESULTS = 50
+
+_NORMALIZE_RE = re.compile(r"[\s\-_.]+")
+_PLANET_LETTER_RE = re.compile(r"^(.*\S)\s+[a-z]$")
+
+# Angka polos diperlakukan sebagai ID katalog numerik
+_NUMERIC_PREFIXES = {"kepid": "kic", "epic_id": "epic", "tic_id": "tic"}
+
+
+def normalize_name(name):
+    """
+    Case/space/punctuation-insensitive key: "Kepler-22 b" -> "kepler22b".
+    """
+    return _NORMALIZE_RE.sub("", str(name)).lower()
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Exact (hash), prefix (sorted keys + bisect) and fuzzy (trigram) lookup
+    over the resolver sources.
+    """
+
+    def __init__(self, sources):
+        self.records = []
+        self.exact = defaultdict(set)
+        seen = set()
+        for source, rows in sources.items():
+            for row in rows:
+                signature = (source, tuple(sorted(row.items())))
+                if signature in seen:
+                    continue
+                seen.add(signature)
+                record_id = len(self.records)
+                self.records.append(dict(row, source=source))
+                for column in RESOLVER_SOURCES[source]["names"]:
+                    for key in self._keys(column, row.get(column)):
+                        self.exact[key].add(record_id)
+
+        self.sorted_keys = sorted(self.exact)
+        self.trigram_index = defaultdict(set)
+        for key in self.sorted_keys:
+            for gram in _trigrams(key):
+                self.trigram_index[gram].add(key)
+        self.built_at = time.time()
+
+    @staticmethod
+    def _keys(column, value):
+        if value is None or value == "":
+            return []
+        key = normalize_name(value)
+        keys = [key]
+        prefix = _NUMERIC_PREFIXES.get(column)
+        if prefix:
+            # "10593626", "KIC 10593626" dan "kic10593626" sama-sama cocok
+            digits = key[len(prefix):] if key.startswith(prefix) else key
+            keys = [digits, prefix + digits]
+        return keys
+
+    def _records(self, keys, limit):
+        ids = []
+        seen = set()
+        for key in keys:
+            for record_id in sorted(self.exact.get(key, ())):
+                if record_id not in seen:
+                    seen.add(record_id)
+                    ids.append(record_id)
+        return [self.records[i] for i in ids[:limit]]
+
+    def lookup(self, name, limit=MAX_RESULTS):
+        return self._records([normalize_name(name)], limit)
+
+    def prefix(self, name, limit=MAX_RESULTS):
+        key = normalize_name(name)
+        start = bisect.bisect_left(self.sorted_keys, key)
+        keys = []
+        for candidate in self.sorted_keys[start:]:
+            if not candidate.startswith(key) or len(keys) >= limit:
+                break
+            keys.append(candidate)
+        return self._records(keys, limit)
+
+    def fuzzy(self, name, limit=MAX_RESULTS, min_score=0.3):
+        grams = _trigrams(normalize_name(name))
+        counts = defaultdict(int)
+        for gram in grams:
+            for key in self.trigram_index.get(gram, ()):
+                counts[key] += 1
+        scored = []
+        for key, shared in counts.items():
+            score = shared / (len(grams) + len(_trigrams(key)) - shared)
+            if score >= min_score:
+                scored.append((score, key))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return self._records([key for _, key in scored[:limit]], limit)
+
+    def related(self, records):
+        """
+        Host rows for planet matches (e.g. "Kepler-22 b" -> host "Kepler-22"),
+        so a planet name also resolves to its TIC / Gaia ids.
+        """
+        hosts = []
+        for record in records:
+            match = _PLANET_LETTER_RE.match(record.get("pl_name") or "")
+            if match:
+                hosts.extend(r for r in self.lookup(match.group(1)) if r["source"] == "stellarhosts")
+        unique = {id(r): r for r in hosts if r not in records}
+        return list(unique.values())
+
+    def stats(self):
+        return {"records": len(self.records), "keys": len(self.sorted_keys), "built_at": self.built_at}
+
+
+_index = None
+_index_lock = threading.Lock()
+_rebuilding = False
+
+
+def _load_sources():
+    return {
+        table: read_table(spec["query"], table, timeout=RESOLVER_LOAD_TIMEOUT)
+        for table, spec in RESOLVER_SOURCES.items()
+    }
+
+
+def _rebuild():
+    global _index, _rebuilding
+    try:
+        index = NameIndex(_load_sources())
+        with _index_lock:
+            _index = index
+    except Exception as e:
+        print(f"❌ Resolver index rebuild failed: {e}")
+    finally:
+        _rebuilding = False
+
+
+def get_index():
+    """
+    Return the worker's name index. The first call builds it; afterwards it
+    is rebuilt in the background every RESOLVER_REFRESH seconds.
+    """
+    global _index, _rebuilding
+    with _index_lock:
+        index = _index
+        if index is not None and time.time() - index.built_at > RESOLVER_REFRESH and not _rebuilding:
+            _rebuilding = True
+            threading.Thread(target=_rebuild, name="resolver-rebuild", daemon=True).start()
+    if index is not None:
+        return index
+    # Belum ada index: bangun sekali (request lain menunggu lock yang sama)
+    with _index_lock:
+        if _index is None:
+            _index = NameIndex(_load_sources())
+        return _index
+
+
+def resolve(name, mode="auto", limit=MAX_RESULTS):
+    """
+    Resolve one name. Returns (match_type, records); auto mode falls back
+    from exact to prefix to fuzzy matching.
+    """
+    index = get_index()
+    modes = ("exact", "prefix", "fuzzy") if mode == "auto" else (mode,)
+    for current in modes:
+        if current == "exact":
+            records = index.lookup(name, limit)
+        elif current == "prefix":
+            records = index.prefix(name, limit)
+        else:
+            records = index.fuzzy(name, limit)
+        if records:
+            return current, records + index.related(records)
+    return None, []
+
+
+def resolve_many(names, limit=MAX_RESULTS):
+    index = get_index()
+    return {name: index.lookup(name, limit) for name in names}
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: hanya deduplikasi dalam satu proses
+    fcntl = None
+
+# Koordinasi antar worker lewat file lock di direktori bersama (opsional).
+SINGLEFLIGHT_CROSS_WORKER = os.getenv("TAP_SINGLEFLIGHT_CROSS_WORKER", "false").lower() in ("1", "true", "yes")
+SINGLEFLIGHT_DIR = os.getenv("TAP_SINGLEFLIGHT_DIR", os.path.join(tempfile.gettempdir(), "exoplanet-tap-singleflight"))
+# Hasil worker lain dipakai ulang jika umurnya belum lewat window ini (detik)
+SINGLEFLIGHT_SHARE_WINDOW = int(os.getenv("TAP_SINGLEFLIGHT_SHARE_WINDOW", "60"))
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution whose
+    result (or exception) is handed to every waiting caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def _paths(key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return (
+        os.path.join(SINGLEFLIGHT_DIR, f"{digest}.lock"),
+        os.path.join(SINGLEFLIGHT_DIR, f"{digest}.json"),
+    )
+
+
+def cross_worker(key, fn):
+    """
+    Serialize identical upstream calls across worker processes on the same
+    host. The first worker fetches and drops the JSON result next to the
+    lock; workers that were waiting on the lock reuse it instead of
+    calling upstream again.
+    """
+    if not SINGLEFLIGHT_CROSS_WORKER or fcntl is None:
+        return fn()
+
+    os.makedirs(SINGLEFLIGHT_DIR, exist_ok=True)
+    lock_path, result_path = _paths(key)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                if time.time() - os.path.getmtime(result_path) < SINGLEFLIGHT_SHARE_WINDOW:
+                    with open(result_path) as fh:
+                        return json.load(fh)
+            except (OSError, ValueError):
+                pass
+
+            result = fn()
+            tmp_path = f"{result_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as fh:
+                json.dump(result, fh)
+            os.replace(tmp_path, result_path)
+            return result
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+tap_flight = SingleFlight()
+
+
+def fetch_once(key, fn):
+    """
+    Single-flight `fn` for `key` within this worker and, if enabled,
+    across workers.
+    """
+    return tap_flight.do(key, lambda: cross_worker(key, fn))
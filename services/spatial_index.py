@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+from services.archive_mirror import read_table, data_timestamp
+from services.tap_cache import cached_tap_query
+
+# Katalog dengan posisi RA/Dec yang bisa dicari per posisi langit.
+#   local   : True  -> seluruh katalog di-index lokal (k-d tree, per worker)
+#             False -> terlalu besar untuk di-index; cone/box dikirim ke TAP
+#                      sebagai CONTAINS(POINT, CIRCLE) / BETWEEN dan di-cache
+SPATIAL_CATALOGS = {
+    "ml": {
+        "table": "ml",
+        "columns": ["pl_name", "ra", "dec", "rastr", "decstr", "pl_massj", "pl_masse"],
+        "local": True,
+    },
+    "hwo": {
+        "table": "di_stars_exep",
+        "columns": ["star_name", "ra", "dec", "sy_dist", "st_mass", "st_rad", "st_teff"],
+        "local": True,
+    },
+    "pscomppars": {
+        "table": "pscomppars",
+        "columns": ["pl_name", "hostname", "ra", "dec", "sy_dist", "discoverymethod"],
+        "local": True,
+    },
+    "kelt": {
+        "table": "kelttimeseries",
+        "columns": ["kelt_sourceid", "kelt_field", "kelt_orientation", "ra", "dec", "kelt_mag", "npts"],
+        "local": False,
+    },
+    "superwasp": {
+        "table": "superwasptimeseries",
+        "columns": ["sourceid", "ra", "dec", "hjdstart", "hjdstop"],
+        "local": False,
+    },
+}
+SPATIAL_REFRESH = int(os.getenv("SPATIAL_REFRESH", "3600"))
+MAX_LOCAL_RADIUS = 180.0
+MAX_REMOTE_RADIUS = float(os.getenv("SPATIAL_MAX_REMOTE_RADIUS", "1.0"))
+MAX_RESULTS = int(os.getenv("SPATIAL_MAX_RESULTS", "1000"))
+REMOTE_TIMEOUT = 60
+
+
+class SpatialQueryError(ValueError):
+    """Raised for invalid positions, radii or catalogs."""
+
+
+def unit_vectors(ra, dec):
+    ra, dec = np.radians(ra), np.radians(dec)
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+
+
+def chord_to_degrees(chord):
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
+
+
+def degrees_to_chord(degrees):
+    return 2 * np.sin(np.radians(degrees) / 2)
+
+
+def angular_distance(ra, dec, ra0, dec0):
+    return chord_to_degrees(np.linalg.norm(unit_vectors(ra, dec) - unit_vectors([ra0], [dec0]), axis=1))
+
+
+def _ra_in_range(ra, ra_min, ra_max):
+    # Rentang RA boleh melewati 0/360 (mis. 350..10)
+    if ra_min <= ra_max:
+        return (ra >= ra_min) & (ra <= ra_max)
+    return (ra >= ra_min) | (ra <= ra_max)
+
+
+def catalog_query(spec):
+    return f"SELECT {', '.join(spec['columns'])} FROM {spec['table']} WHERE ra IS NOT NULL AND dec IS NOT NULL"
+
+
+class SkyIndex:
+    """
+    k-d tree over unit vectors of one catalog's positions.
+    """
+
+    def __init__(self, rows, data_time=None):
+        rows = [row for row in rows if row.get("ra") is not None and row.get("dec") is not None]
+        self.rows = rows
+        self.ra = np.array([row["ra"] for row in rows], dtype=np.float64)
+        self.dec = np.array([row["dec"] for row in rows], dtype=np.float64)
+        self.tree = cKDTree(unit_vectors(self.ra, self.dec)) if rows else None
+        self.data_time = data_time
+        self.built_at = time.time()
+
+    def _result(self, indices, distances):
+        return [dict(self.rows[i], _dist=float(d)) for i, d in zip(indices, distances)]
+
+    def cone(self, ra, dec, radius, limit):
+        if self.tree is None:
+            return []
+        center = unit_vectors([ra], [dec])[0]
+        indices = np.asarray(self.tree.query_ball_point(center, degrees_to_chord(radius)), dtype=int)
+        if not len(indices):
+            return []
+        distances = chord_to_degrees(np.linalg.norm(self.tree.data[indices] - center, axis=1))
+        order = np.argsort(distances)[:limit]
+        return self._result(indices[order], distances[order])
+
+    def nearest(self, ra, dec, k):
+        if self.tree is None:
+            return []
+        k = min(k, len(self.rows))
+        chords, indices = self.tree.query(unit_vectors([ra], [dec])[0], k=k)
+        chords, indices = np.atleast_1d(chords), np.atleast_1d(indices)
+        return self._result(indices, chord_to_degrees(chords))
+
+    def box(self, ra_min, ra_max, dec_min, dec_max, limit):
+        mask = _ra_in_range(self.ra, ra_min, ra_max) & (self.dec >= dec_min) & (self.dec <= dec_max)
+        indices = np.flatnonzero(mask)[:limit]
+        return [dict(self.rows[i]) for i in indices]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_sky_index(catalog):
+    """
+    Return the per-worker SkyIndex of a local catalog, rebuilt when the
+    underlying cache/mirror data changes or after SPATIAL_REFRESH seconds.
+    """
+    spec = SPATIAL_CATALOGS[catalog]
+    query = catalog_query(spec)
+    data_time = data_timestamp(query, spec["table"])
+    with _indexes_lock:
+        index = _indexes.get(catalog)
+        if index is not None and index.data_time == data_time and time.time() - index.built_at < SPATIAL_REFRESH:
+            return index
+    rows = read_table(query, spec["table"])
+    index = SkyIndex(rows, data_timestamp(query, spec["table"]))
+    with _indexes_lock:
+        _indexes[catalog] = index
+    return index
+
+
+def _validate_position(ra, dec):
+    if not 0 <= ra <= 360 or not -90 <= dec <= 90:
+        raise SpatialQueryError("ra must be within [0, 360] and dec within [-90, 90] degrees")
+
+
+def _spec(catalog):
+    spec = SPATIAL_CATALOGS.get(catalog)
+    if spec is None:
+        raise SpatialQueryError(f"catalog must be one of: {', '.join(SPATIAL_CATALOGS)}")
+    return spec
+
+
+def _validate_limit(limit):
+    if not 1 <= limit <= MAX_RESULTS:
+        raise SpatialQueryError(f"limit must be within [1, {MAX_RESULTS}]")
+
+
+def _remote_rows(spec, where):
+    query = f"SELECT TOP {MAX_RESULTS} {', '.join(spec['columns'])} FROM {spec['table']} WHERE {where}"
+    return cached_tap_query(query, timeout=REMOTE_TIMEOUT)
+
+
+def cone_search(catalog, ra, dec, radius, limit=MAX_RESULTS):
+    """
+    Objects within `radius` degrees of (ra, dec), nearest first, with their
+    angular distance in `_dist` (degrees).
+    """
+    spec = _spec(catalog)
+    _validate_position(ra, dec)
+    _validate_limit(limit)
+    max_radius = MAX_LOCAL_RADIUS if spec["local"] else MAX_REMOTE_RADIUS
+    if not 0 < radius <= max_radius:
+        raise SpatialQueryError(f"radius must be within (0, {max_radius}] degrees for {catalog}")
+    if spec["local"]:
+        return get_sky_index(catalog).cone(ra, dec, radius, limit)
+
+    rows = _remote_rows(spec, f"CONTAINS(POINT('ICRS', ra, dec), CIRCLE('ICRS', {ra!r}, {dec!r}, {radius!r})) = 1")
+    rows = [row for row in rows if row.get("ra") is not None and row.get("dec") is not None]
+    if not rows:
+        return []
+    distances = angular_distance([r["ra"] for r in rows], [r["dec"] for r in rows], ra, dec)
+    order = np.argsort(distances)[:limit]
+    return [dict(rows[i], _dist=float(distances[i])) for i in order]
+
+
+def nearest_search(catalog, ra, dec, k=1):
+    spec = _spec(catalog)
+    _validate_position(ra, dec)
+    if not spec["local"]:
+        raise SpatialQueryError(f"nearest-neighbour search needs a local catalog, {catalog} is not indexed locally")
+    if not 1 <= k <= MAX_RESULTS:
+        raise SpatialQueryError(f"k must be within [1, {MAX_RESULTS}]")
+    return get_sky_index(catalog).nearest(ra, dec, k)
+
+
+def box_search(catalog, ra_min, ra_max, dec_min, dec_max, limit=MAX_RESULTS):
+    spec = _spec(catalog)
+    _validate_position(ra_min, dec_min)
+    _validate_position(ra_max, dec_max)
+    if dec_min > dec_max:
+        raise SpatialQueryError("dec_min must not be greater than dec_max")
+    _validate_limit(limit)
+    if spec["local"]:
+        return get_sky_index(catalog).box(ra_min, ra_max, dec_min, dec_max, limit)
+
+    # ra_min > ra_max = box melintasi RA 0; 0..360 adalah lingkaran penuh
+    span = ra_max - ra_min if ra_min <= ra_max else ra_max - ra_min + 360
+    if span * (dec_max - dec_min) > (2 * MAX_REMOTE_RADIUS) ** 2:
+        raise SpatialQueryError(f"box is too large for {catalog}")
+    if ra_min <= ra_max:
+        ra_clause = f"ra BETWEEN {ra_min!r} AND {ra_max!r}"
+    else:
+        ra_clause = f"(ra >= {ra_min!r} OR ra <= {ra_max!r})"
+    return _remote_rows(spec, f"{ra_clause} AND dec BETWEEN {dec_min!r} AND {dec_max!r}")[:limit]
@@ -0,0 +1,310 @@
+import os
+from services.derived_physics import derived_inputs, derived_fields_for
+
+# Registry deklaratif tabel arsip NASA yang diekspos sebagai route GET.
+# Semua route di routes/archive_route.py dibuat dari daftar ini, sehingga
+# caching, mirror, paginasi, streaming, format output dan metrik berlaku
+# sama untuk setiap tabel.
+#
+#   name        : endpoint Flask (unik)          path      : URL route
+#   label       : nama layanan di pesan error    description : untuk docstring/listing
+#   table       : tabel TAP                      columns   : kolom SELECT
+#   where       : klausa ADQL WHERE (list, AND)  order     : [(kolom, "ASC"|"DESC")]
+#   max_rows    : TOP n (None = semua)           timeout   : read timeout upstream (detik)
+#   ttl         : TTL cache (None = default per tabel di tap_cache)
+#   max_age     : Cache-Control max-age untuk browser (None = default di utils/http_cache)
+#   mongo_filter: filter Mongo padanan `where` (untuk tabel yang di-mirror)
+#   fallback    : query saat hasil kosong -> 404 {"message", <key>: rows}
+#   empty       : pesan 404 saat hasil kosong (tanpa fallback query)
+#   stream      : kirim body secara streaming (tabel besar)
+#   warm        : di-prefetch oleh warmup
+#   keyset      : (kolom urut, tiebreak) untuk paginasi ?limit=&cursor=
+#   numeric     : kolom filter <kolom>_min / <kolom>_max
+#   equality    : kolom filter <kolom>=nilai
+#   derived     : kolom turunan (services/derived_physics) boleh diminta lewat ?fields=
+
+DEFAULT_TIMEOUT = int(os.getenv("TAP_READ_TIMEOUT", "30"))
+
+KOI_COLUMNS = ["kepid", "kepoi_name", "koi_disposition", "koi_period", "koi_prad", "koi_smass", "koi_srad", "koi_steff"]
+KOI_NUMERIC = ["koi_period", "koi_prad", "koi_smass", "koi_srad", "koi_steff"]
+
+
+def _koi_delivery(name, path, table, label, disposition="koi_disposition"):
+    columns = [disposition if col == "koi_disposition" else col for col in KOI_COLUMNS]
+    return {
+        "name": name,
+        "path": path,
+        "label": label,
+        "description": label,
+        "table": table,
+        "columns": columns,
+        "where": [f"{disposition} IN ('CANDIDATE', 'CONFIRMED')"],
+        "order": [("koi_period", "ASC")],
+        "empty": f"No data found for {label}.",
+        "stream": True,
+        "keyset": ("koi_period", "kepoi_name"),
+        "numeric": KOI_NUMERIC,
+        "equality": [disposition],
+    }
+
+
+ARCHIVE_TABLES = [
+    {
+        "name": "fetch_exoplanets",
+        "path": "/api/exoplanets",
+        "label": "NASA's Exoplanet Archive TAP",
+        "description": "Planetary Systems Composite Parameters Table (pscomppars)",
+        "table": "pscomppars",
+        "columns": ["pl_name", "discoverymethod", "pl_orbper", "pl_radj"],
+        "where": ["pl_orbper IS NOT NULL"],
+        "mongo_filter": {"pl_orbper": {"$ne": None}},
+        "order": [("pl_orbper", "ASC")],
+        "warm": True,
+        "keyset": ("pl_orbper", "pl_name"),
+        "numeric": ["pl_orbper", "pl_radj"],
+        "equality": ["discoverymethod"],
+    },
+    {
+        "name": "fetch_tess_candidates",
+        "path": "/api/tess-candidates",
+        "label": "TESS Candidates",
+        "description": "TESS Objects of Interest (TOI) Table",
+        "table": "toi",
+        "columns": ["tid", "toi", "pl_orbper", "pl_rade", "st_teff"],
+        "where": ["st_teff IS NOT NULL"],
+        "mongo_filter": {"st_teff": {"$ne": None}},
+        "order": [("st_teff", "DESC")],
+        "warm": True,
+    },
+    {
+        "name": "fetch_planetary_systems",
+        "path": "/api/planetary-systems",
+        "label": "Planetary Systems",
+        "description": "Planetary Systems Composite Parameters Table",
+        "table": "pscomppars",
+        "columns": ["pl_name", "hostname", "discoverymethod", "pl_orbper", "pl_radj", "pl_eqt"],
+        "where": ["pl_orbper IS NOT NULL"],
+        "mongo_filter": {"pl_orbper": {"$ne": None}},
+        "order": [("pl_orbper", "ASC")],
+        "warm": True,
+        "keyset": ("pl_orbper", "pl_name"),
+        "numeric": ["pl_orbper", "pl_radj", "pl_eqt"],
+        "equality": ["hostname", "discoverymethod"],
+    },
+    {
+        "name": "fetch_microlensing_data",
+        "path": "/api/microlensing",
+        "label": "Microlensing",
+        "description": "Microlensing Table",
+        "table": "ml",
+        "columns": ["pl_name", "rastr", "decstr", "pl_massj", "pl_masse"],
+        "where": ["pl_masse IS NOT NULL"],
+        "order": [("pl_masse", "DESC")],
+    },
+    {
+        "name": "fetch_stellar_hosts",
+        "path": "/api/stellar-hosts",
+        "label": "Stellar Hosts",
+        "description": "Stellar Hosts Table",
+        "table": "stellarhosts",
+        "columns": ["hostname", "sy_name", "hd_name", "hip_name", "tic_id", "gaia_id", "sy_snum", "sy_pnum", "sy_mnum", "cb_flag"],
+        "where": ["cb_flag IS NOT NULL"],
+        "mongo_filter": {"cb_flag": {"$ne": None}},
+        "order": [("cb_flag", "DESC")],
+        "fallback": {
+            "query": "SELECT DISTINCT hostname FROM stellarhosts",
+            "key": "available_hostnames",
+            "message": "No data found for stellar hosts.",
+        },
+    },
+    {
+        "name": "fetch_pscomppars",
+        "path": "/api/pscomppars",
+        "label": "Planetary Systems Composite Parameters",
+        "description": "Planetary Systems Composite Parameters Table",
+        "table": "pscomppars",
+        "columns": ["pl_name", "hostname", "discoverymethod", "pl_orbper", "pl_radj", "pl_eqt", "st_teff", "st_mass", "st_rad"],
+        "where": ["pl_orbper IS NOT NULL"],
+        "mongo_filter": {"pl_orbper": {"$ne": None}},
+        "order": [("pl_orbper", "ASC")],
+        "stream": True,
+        "warm": True,
+        "keyset": ("pl_orbper", "pl_name"),
+        "numeric": ["pl_orbper", "pl_radj", "pl_eqt", "st_teff", "st_mass", "st_rad"],
+        "equality": ["hostname", "discoverymethod"],
+        "derived": True,
+    },
+    {
+        "name": "fetch_kepler_names",
+        "path": "/api/kepler-names",
+        "label": "Kepler Names",
+        "description": "Kepler Confirmed Names Table",
+        "table": "keplernames",
+        "columns": ["kepid", "koi_name", "kepler_name", "pl_name"],
+        "where": ["kepler_name IS NOT NULL"],
+        "mongo_filter": {"kepler_name": {"$ne": None}},
+        "order": [("pl_name", "DESC")],
+        "fallback": {
+            "query": "SELECT DISTINCT kepler_name FROM keplernames",
+            "key": "available_kepler_names",
+            "message": "No data found for kepler_name.",
+        },
+    },
+    {
+        "name": "fetch_k2_names",
+        "path": "/api/k2-names",
+        "label": "K2 Names",
+        "description": "K2 Confirmed Names Table",
+        "table": "k2names",
+        "columns": ["epic_id", "k2_name", "pl_name"],
+        "where": ["k2_name = 'CONFIRMED'"],
+        "mongo_filter": {"k2_name": "CONFIRMED"},
+        "order": [("pl_name", "DESC")],
+        "fallback": {
+            "query": "SELECT DISTINCT k2_name FROM k2names",
+            "key": "available_k2_names",
+            "message": "No data found for k2_name = 'CONFIRMED'.",
+        },
+    },
+    {
+        "name": "fetch_k2_planets_candidates",
+        "path": "/api/k2-planets-candidates",
+        "label": "K2 Planets and Candidates",
+        "description": "K2 Planets and Candidates Table",
+        "table": "k2pandc",
+        "columns": ["pl_name", "hostname", "pl_letter", "k2_name", "cb_flag", "discoverymethod", "disc_year",
+                    "disc_telescope", "pl_orbper", "pl_orbsmax", "pl_masse", "pl_msinie", "st_mass", "st_spectype"],
+        "max_rows": 5,
+    },
+    {
+        "name": "fetch_ukirt_data",
+        "path": "/api/ukirt",
+        "label": "UKIRT",
+        "description": "UKIRT Time Series Table",
+        "table": "ukirttimeseries",
+        "columns": ["sourceid", "obs_year", "bulge", "field", "ccdid", "k2c9_flag", "ukirt_id",
+                    "moa_id", "statnpts", "minvalue", "maxvalue", "median"],
+        "where": ["statnpts IS NOT NULL"],
+        "order": [("median", "ASC")],
+        "max_rows": 100,
+        "timeout": 60,
+    },
+    {
+        "name": "fetch_superwasp_data",
+        "path": "/api/superwasp",
+        "label": "SuperWASP",
+        "description": "SuperWASP Time Series Table",
+        "table": "superwasptimeseries",
+        "columns": ["sourceid", "ra", "dec", "hjdstart", "hjdstop"],
+        "where": ["hjdstart IS NOT NULL"],
+        "order": [("hjdstart", "ASC")],
+        "max_rows": 100,
+        "timeout": 60,
+    },
+    {
+        "name": "fetch_hwo_stars",
+        "path": "/api/hwo-stars",
+        "label": "HWO Stars",
+        "description": "HWO ExEP Precursor Science Stars Table",
+        "table": "di_stars_exep",
+        "columns": ["star_name", "ra", "dec", "sy_dist", "st_mass", "st_rad", "st_teff"],
+        "where": ["sy_dist IS NOT NULL"],
+        "order": [("sy_dist", "ASC")],
+        "fallback": {
+            "query": "SELECT DISTINCT star_name FROM di_stars_exep",
+            "key": "available_star_names",
+            "message": "No data found for HWO stars.",
+        },
+    },
+    {
+        "name": "fetch_transiting_planets",
+        "path": "/api/transiting-planets",
+        "label": "Transiting Planets",
+        "description": "Transiting Planets Table",
+        "table": "TD",
+        "columns": ["pl_name", "hostname", "pl_orbper", "pl_radj", "pl_trandep", "pl_trandur", "pl_tranmid"],
+        "where": ["pl_orbper IS NOT NULL"],
+        "order": [("pl_orbper", "ASC")],
+        "keyset": ("pl_orbper", "pl_name"),
+        "numeric": ["pl_orbper", "pl_radj", "pl_trandep", "pl_trandur"],
+        "equality": ["hostname"],
+    },
+    {
+        "name": "fetch_koi_cumulative",
+        "path": "/api/koi-cumulative",
+        "label": "KOI Cumulative Delivery Table",
+        "description": "KOI Cumulative Delivery Table",
+        "table": "cumulative",
+        "columns": KOI_COLUMNS,
+        "where": ["koi_disposition IN ('CANDIDATE', 'CONFIRMED')"],
+        "mongo_filter": {"koi_disposition": {"$in": ["CANDIDATE", "CONFIRMED"]}},
+        "order": [("koi_period", "ASC")],
+        "stream": True,
+        "warm": True,
+        "keyset": ("koi_period", "kepoi_name"),
+        "numeric": KOI_NUMERIC,
+        "equality": ["koi_disposition"],
+    },
+    _koi_delivery("fetch_koi_q1q6", "/api/koi-q1q6", "q1_q6_koi", "KOI Q1-Q6 Delivery Table"),
+    _koi_delivery("fetch_koi_q1q8", "/api/koi-q1q8", "q1_q8_koi", "KOI Q1-Q8 Delivery Table"),
+    _koi_delivery("fetch_koi_q1q12", "/api/koi-q1q12", "q1_q12_koi", "KOI Q1-Q12 Delivery Table", disposition="koi_pdisposition"),
+    _koi_delivery("fetch_koi_q1q16", "/api/koi-q1q16", "q1_q16_koi", "KOI Q1-Q16 Delivery Table"),
+    _koi_delivery("fetch_koi_q1q17_dr24", "/api/koi-q1q17-dr24", "q1_q17_dr24_koi", "KOI Q1-Q17 DR24 Delivery Table", disposition="koi_pdisposition"),
+    _koi_delivery("fetch_koi_q1q17_dr25", "/api/koi-q1q17-dr25", "q1_q17_dr25_koi", "KOI Q1-Q17 DR25 Delivery Table"),
+    _koi_delivery("fetch_koi_q1q17_dr25_supplemental", "/api/koi-q1q17-dr25-supplemental", "q1_q17_dr25_sup_koi",
+                  "KOI Q1-Q17 DR25 Supplemental Delivery Table"),
+]
+
+TABLES_BY_NAME = {spec["name"]: spec for spec in ARCHIVE_TABLES}
+
+
+def build_table_query(spec):
+    """
+    Build the full-table ADQL for a registry entry.
+    """
+    top = f"TOP {spec['max_rows']} " if spec.get("max_rows") else ""
+    query = f"SELECT {top}{', '.join(spec['columns'])} FROM {spec['table']}"
+    if spec.get("where"):
+        query += f" WHERE {' AND '.join(spec['where'])}"
+    if spec.get("order"):
+        query += " ORDER BY " + ", ".join(f"{col} {direction}" for col, direction in spec["order"])
+    return query
+
+
+def mongo_sort(spec):
+    return [(col, 1 if direction == "ASC" else -1) for col, direction in spec.get("order", [])]
+
+
+def page_spec_for(spec):
+    """
+    Derive the utils.pagination spec for a registry entry, or None if the
+    table has no keyset declared.
+    """
+    if not spec.get("keyset"):
+        return None
+    order, tiebreak = spec["keyset"]
+    # Baris dengan kolom urut NULL tidak bisa dijangkau cursor keyset
+    # (`order > x` tidak pernah true untuk NULL), jadi dikecualikan di halaman
+    where = list(spec.get("where", []))
+    not_null = f"{order} IS NOT NULL"
+    if not_null not in where:
+        where.append(not_null)
+    mongo_filter = dict(spec.get("mongo_filter", {}))
+    existing = mongo_filter.get(order)
+    if existing is None:
+        mongo_filter[order] = {"$ne": None}
+    elif isinstance(existing, dict) and "$ne" not in existing:
+        mongo_filter[order] = dict(existing, **{"$ne": None})
+    return {
+        "table": spec["table"],
+        "columns": spec["columns"],
+        "where": where,
+        "mongo_filter": mongo_filter,
+        "order": order,
+        "tiebreak": tiebreak,
+        "numeric": spec.get("numeric", []),
+        "equality": spec.get("equality", []),
+        "derived": {
+            field: derived_inputs([field]) for field in derived_fields_for(spec["columns"])
+        } if spec.get("derived") else {},
+    }
@@ -0,0 +1,65 @@
+import json
+from itertools import chain
+from services.tap_client import iter_tap_bytes
+from services.tap_cache import peek_cached, disk_table, fill_disk
+from services.archive_mirror import serve_from_mirror, mirror_ready, iter_mirror, select_columns
+
+# Jumlah baris yang di-encode per chunk saat men-stream list/cursor
+STREAM_BATCH_ROWS = 500
+
+
+def iter_json_array(rows, batch_rows=STREAM_BATCH_ROWS, default=str):
+    """
+    Encode an iterable of row dicts as a JSON array, a batch of rows at a
+    time, so the full serialized body never exists in memory at once.
+    """
+    yield "["
+    batch = []
+    first = True
+    for row in rows:
+        batch.append(json.dumps(row, default=default))
+        if len(batch) >= batch_rows:
+            yield ("" if first else ",") + ",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ("" if first else ",") + ",".join(batch)
+    yield "]"
+
+
+def stream_table(query, table=None, mongo_filter=None, sort=None, limit=0, timeout=None):
+    """
+    Return (iterator of JSON body chunks, version directory) for an archive
+    query, or (None, None) if the result is empty. The directory is the
+    DiskTable version the rows were read from (None for other sources),
+    where the compressed body can be kept.
+
+    Rows come from the Mongo mirror, the result cache or the shared on-disk
+    tier (memory-mapped). A miss on a disk-backed query fills the disk tier
+    under the query's fill lock, so concurrent misses wait for one upstream
+    fetch and then all stream the same DiskTable. Only when the result
+    can't be stored on disk is the upstream TAP body forwarded as-is,
+    without ever being parsed.
+    """
+    if table and serve_from_mirror() and mirror_ready(table):
+        # `limit` = TOP n dari query, yang tidak berlaku untuk mirror
+        rows = iter_mirror(table, select_columns(query), mongo_filter, sort, limit)
+        first = next(rows, None)
+        if first is None:
+            return None, None
+        return iter_json_array(chain([first], rows)), None
+
+    cached = peek_cached(query, timeout=timeout)
+    if cached is not None:
+        return (iter_json_array(cached), None) if cached else (None, None)
+
+    table = disk_table(query, timeout=timeout) or fill_disk(query, timeout=timeout)
+    if table is not None:
+        return (iter_json_array(table.iter_rows()), table.path) if table.nrows else (None, None)
+
+    body = iter_tap_bytes(query, timeout=timeout)
+    first = next(body, b"")
+    if first.strip() in (b"", b"[]"):
+        body.close()
+        return None, None
+    return chain([first], body), None
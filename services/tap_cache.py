@@ -0,0 +1,286 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from services.tap_client import normalize_query, tap_query_json
+from services.singleflight import fetch_once
+from services import disk_cache
+
+# TTL (detik) per tabel arsip. Tabel NASA paling cepat berubah harian,
+# jadi default-nya cukup panjang; tabel time-series hampir statis.
+TABLE_TTLS = {
+    "pscomppars": 6 * 3600,
+    "ps": 6 * 3600,
+    "toi": 3600,
+    "cumulative": 6 * 3600,
+    "k2pandc": 6 * 3600,
+    "keplernames": 24 * 3600,
+    "k2names": 24 * 3600,
+    "stellarhosts": 6 * 3600,
+    "ml": 24 * 3600,
+    "td": 24 * 3600,
+    "di_stars_exep": 24 * 3600,
+    "kelttimeseries": 24 * 3600,
+    "superwasptimeseries": 24 * 3600,
+    "ukirttimeseries": 24 * 3600,
+}
+DEFAULT_TTL = int(os.getenv("TAP_CACHE_DEFAULT_TTL", "3600"))
+
+# Setelah TTL habis, nilai lama masih boleh disajikan selama STALE_GRACE
+# detik sambil di-refresh di background (stale-while-revalidate).
+STALE_GRACE = int(os.getenv("TAP_CACHE_STALE_GRACE", str(24 * 3600)))
+MAX_ENTRIES = int(os.getenv("TAP_CACHE_MAX_ENTRIES", "128"))
+# Hasil dari tier disk yang lebih besar dari ini tidak disalin ke memori
+# worker; tabel besar tetap dibaca lewat DiskTable (mmap)
+MEMORY_MAX_ROWS = int(os.getenv("TAP_CACHE_MEMORY_MAX_ROWS", "2000"))
+
+_FROM_RE = re.compile(r"\bFROM\s+([\w.]+)", re.IGNORECASE)
+
+
+def table_for_query(query):
+    match = _FROM_RE.search(query)
+    return match.group(1).lower() if match else None
+
+
+def ttl_for_query(query):
+    return TABLE_TTLS.get(table_for_query(query), DEFAULT_TTL)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries carry their own TTL.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, stale_grace=STALE_GRACE):
+        self.max_entries = max_entries
+        self.stale_grace = stale_grace
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return (value, is_fresh) or None if missing or past the stale grace.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = now - entry["stored_at"]
+            if age > entry["ttl"] + self.stale_grace:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["value"], age <= entry["ttl"]
+
+    def set(self, key, value, ttl, stored_at=None):
+        with self._lock:
+            self._entries[key] = {"value": value, "stored_at": stored_at or time.time(), "ttl": ttl}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stored_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["stored_at"] if entry else None
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+
+tap_cache = TTLCache()
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Query yang disimpan ke tier disk: hanya query tabel penuh dari registry
+# dan sumber engine ADQL lokal. Hasil lain (halaman, filter, query bebas)
+# cukup di memori supaya client tidak bisa memenuhi disk.
+_disk_keys = set()
+
+
+def register_disk_query(query):
+    _disk_keys.add(normalize_query(query))
+
+
+def is_disk_backed(key):
+    return disk_cache.DISK_CACHE_ENABLED and key in _disk_keys
+
+
+def _tap_loader(query, timeout, retry=True):
+    return lambda: tap_query_json(query, timeout=timeout, retry=retry)
+
+
+def _keep_if_small(key, rows, table):
+    if table.nrows <= MEMORY_MAX_ROWS:
+        tap_cache.set(key, rows, table.meta["ttl"], stored_at=table.stored_at)
+    return rows
+
+
+def store(key, value, ttl):
+    """
+    Store a freshly fetched value: disk-backed queries go to the disk tier
+    (and to memory only when small), everything else to this worker's
+    in-memory cache.
+    """
+    if is_disk_backed(key):
+        table = disk_cache.write_table(key, value, ttl)
+        if table is not None:
+            _keep_if_small(key, value, table)
+            return
+    tap_cache.set(key, value, ttl)
+
+
+def _fill(key, loader, ttl, blocking=True):
+    """
+    Fetch a disk-backed query into the disk tier while holding its
+    per-key fill lock, so each table is fetched and parsed once per host
+    and concurrent misses wait for that fill instead of calling upstream.
+    Returns (DiskTable or None, fetched rows or None); (None, None) when
+    `blocking` is False and the lock is busy.
+    """
+    with disk_cache.fill_lock(key, blocking) as acquired:
+        if not acquired:
+            return None, None
+        # Worker lain mungkin baru saja mengisinya selagi kita menunggu lock
+        on_disk = disk_cache.read_table(key)
+        if on_disk is not None and on_disk[1]:
+            return on_disk[0], None
+        rows = fetch_once(key, loader)
+        return disk_cache.write_table(key, rows, ttl), rows
+
+
+def _refresh(key, loader, ttl):
+    try:
+        if is_disk_backed(key):
+            _fill(key, loader, ttl, blocking=False)
+        else:
+            # Query identik yang sedang berjalan berbagi satu panggilan upstream
+            store(key, fetch_once(key, loader), ttl)
+    except Exception as e:
+        print(f"❌ Background refresh failed for {key[:80]}: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key, loader, ttl):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    threading.Thread(target=_refresh, args=(key, loader, ttl), daemon=True).start()
+
+
+def cached_call(key, loader, ttl):
+    """
+    Return the cached value for `key`, calling `loader()` to fill it.
+
+    A fresh hit is returned directly. A stale hit is returned immediately
+    while a single background refresh is started. Disk-backed queries are
+    read from (or filled into) the shared disk tier; only small ones are
+    also kept in this worker's memory. Concurrent misses for the same key
+    share one upstream call.
+    """
+    cached = tap_cache.get(key)
+    if cached is not None:
+        value, is_fresh = cached
+        if not is_fresh:
+            _schedule_refresh(key, loader, ttl)
+        return value
+
+    if is_disk_backed(key):
+        on_disk = disk_cache.read_table(key)
+        if on_disk is not None:
+            table, is_fresh = on_disk
+            if not is_fresh:
+                _schedule_refresh(key, loader, ttl)
+            return _keep_if_small(key, table.to_rows(), table)
+        table, rows = _fill(key, loader, ttl)
+        if table is not None:
+            return _keep_if_small(key, rows if rows is not None else table.to_rows(), table)
+        if rows is not None:
+            tap_cache.set(key, rows, ttl)
+            return rows
+
+    value = fetch_once(key, loader)
+    tap_cache.set(key, value, ttl)
+    return value
+
+
+def peek_cached(query, ttl=None, timeout=None):
+    """
+    Return the cached rows for a query without ever calling upstream on a
+    miss (returns None). Stale hits still trigger a background refresh.
+    """
+    key = normalize_query(query)
+    cached = tap_cache.get(key)
+    if cached is None:
+        return None
+    value, is_fresh = cached
+    if not is_fresh:
+        _schedule_refresh(key, _tap_loader(query, timeout), ttl if ttl is not None else ttl_for_query(key))
+    return value
+
+
+def cached_at(query):
+    """
+    Return when the cached rows for a query were fetched (epoch seconds),
+    checking this worker's cache and then the disk tier; None on a miss.
+    """
+    key = normalize_query(query)
+    stored_at = tap_cache.stored_at(key)
+    return stored_at if stored_at is not None else disk_cache.stored_at(key)
+
+
+def disk_table(query, ttl=None, timeout=None):
+    """
+    Return the memory-mapped DiskTable of a disk-backed query, bypassing the
+    per-worker in-memory cache, or None on a miss (see fill_disk). A stale
+    table is returned as-is while it is refreshed in the background.
+    """
+    key = normalize_query(query)
+    ttl = ttl if ttl is not None else ttl_for_query(key)
+    loader = _tap_loader(query, timeout)
+    on_disk = disk_cache.read_table(key)
+    if on_disk is not None:
+        table, is_fresh = on_disk
+        if not is_fresh:
+            _schedule_refresh(key, loader, ttl)
+        return table
+    return None
+
+
+def fill_disk(query, ttl=None, timeout=None, loader=None):
+    """
+    Make sure a disk-backed query is on disk (fetching it under its
+    per-key fill lock if needed) and return its DiskTable, or None if it
+    can't be stored. `loader` overrides the TAP fetch (e.g. the mirror).
+    """
+    key = normalize_query(query)
+    if not is_disk_backed(key):
+        return None
+    ttl = ttl if ttl is not None else ttl_for_query(key)
+    table, _ = _fill(key, loader or _tap_loader(query, timeout), ttl)
+    return table
+
+
+def cached_tap_query(query, ttl=None, timeout=None, retry=True):
+    """
+    Return the JSON rows for an ADQL query, served from the result cache
+    (see cached_call). `retry=False` makes a timeout fail fast instead of
+    being retried.
+    """
+    key = normalize_query(query)
+    ttl = ttl if ttl is not None else ttl_for_query(key)
+    return cached_call(key, _tap_loader(query, timeout, retry), ttl)
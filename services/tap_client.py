@@ -0,0 +1,188 @@
+import os
+import re
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Satu client TAP untuk seluruh proses (per gunicorn worker).
+# Session dibuat lazy dan dibuat ulang jika PID berubah (setelah fork),
+# sehingga koneksi keep-alive tidak pernah dibagi antar worker.
+TAP_BASE_URL = os.getenv("TAP_BASE_URL", "https://exoplanetarchive.ipac.caltech.edu/TAP")
+TAP_SYNC_URL = f"{TAP_BASE_URL}/sync"
+
+TAP_CONNECT_TIMEOUT = float(os.getenv("TAP_CONNECT_TIMEOUT", "10"))
+TAP_READ_TIMEOUT = float(os.getenv("TAP_READ_TIMEOUT", "30"))
+TAP_POOL_SIZE = int(os.getenv("TAP_POOL_SIZE", "10"))
+TAP_MAX_RETRIES = int(os.getenv("TAP_MAX_RETRIES", "3"))
+
+DEFAULT_HEADERS = {"User-Agent": "my-api-client"}
+
+# Dua session per proses: dengan retry (default) dan tanpa retry, untuk
+# request yang tidak boleh diulang (timeout pendek gateway, POST job async)
+_sessions = {}
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _build_session(max_retries):
+    session = requests.Session()
+    retries = Retry(
+        total=max_retries,
+        read=max_retries,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        # POST tidak di-retry: membuat job async dua kali di upstream
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,  # biarkan raise_for_status() yang melempar HTTPError
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=TAP_POOL_SIZE,
+        max_retries=retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session(retry=True):
+    """
+    Return the pooled keep-alive session for the current process; with
+    `retry=False` one that never retries (connect, read or status).
+    """
+    global _session_pid
+    pid = os.getpid()
+    session = _sessions.get(retry) if _session_pid == pid else None
+    if session is None:
+        with _session_lock:
+            if _session_pid != pid:
+                _sessions.clear()
+                _session_pid = pid
+            if retry not in _sessions:
+                _sessions[retry] = _build_session(TAP_MAX_RETRIES if retry else 0)
+            session = _sessions[retry]
+    return session
+
+
+# String literal ('...') dan identifier ber-kutip ("...") ADQL; kutip
+# ganda di dalamnya ('' / "") adalah escape, bukan penutup
+_QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """
+    Collapse whitespace so the same ADQL always produces the same request.
+    Quoted literals and identifiers are left untouched.
+    """
+    parts = _QUOTED_RE.split(query)
+    # Indeks genap berada di luar kutip
+    parts[0::2] = [_WHITESPACE_RE.sub(" ", part) for part in parts[0::2]]
+    return "".join(parts).strip()
+
+
+def tap_get(query, timeout=None, stream=False, retry=True):
+    """
+    Run an ADQL query against the TAP sync endpoint and return the response.
+
+    Raises requests.exceptions.RequestException (including HTTPError for
+    non-2xx responses) so route handlers keep their existing error branches.
+    """
+    adql = normalize_query(query)
+    print(f"Querying TAP: {adql}")  # Debugging log
+    response = get_session(retry).get(
+        TAP_SYNC_URL,
+        params={"query": adql, "format": "json"},
+        timeout=(TAP_CONNECT_TIMEOUT, timeout or TAP_READ_TIMEOUT),
+        stream=stream,
+    )
+    response.raise_for_status()
+    return response
+
+
+def tap_query_json(query, timeout=None, retry=True):
+    """
+    Run an ADQL query and return the decoded JSON rows.
+    """
+    return tap_get(query, timeout=timeout, retry=retry).json()
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_tap_bytes(query, timeout=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Open a streaming TAP request and return an iterator over the raw JSON
+    body. The request (and any HTTP error) happens before this returns, so
+    callers can still answer with an error status; the body is then read
+    chunk by chunk and the connection goes back to the pool when done.
+    """
+    return _iter_body(tap_get(query, timeout=timeout, stream=True), chunk_size)
+
+
+def _iter_body(response, chunk_size):
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                yield chunk
+    finally:
+        response.close()
+
+
+# ---------------------------------------------------------------------------
+# Async (UWS) jobs: untuk query berat yang tidak boleh menahan worker
+# ---------------------------------------------------------------------------
+
+TAP_ASYNC_URL = f"{TAP_BASE_URL}/async"
+
+
+def tap_submit_async(query):
+    """
+    Create and start a TAP async job; return its job id.
+    """
+    adql = normalize_query(query)
+    print(f"Submitting TAP async job: {adql}")  # Debugging log
+    response = get_session(retry=False).post(
+        TAP_ASYNC_URL,
+        data={"REQUEST": "doQuery", "LANG": "ADQL", "QUERY": adql, "FORMAT": "json", "PHASE": "RUN"},
+        timeout=(TAP_CONNECT_TIMEOUT, TAP_READ_TIMEOUT),
+        allow_redirects=False,
+    )
+    response.raise_for_status()
+    # UWS membalas 303 See Other ke URL job: .../async/<job_id>
+    job_url = response.headers.get("Location") or response.url
+    return job_url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def tap_job_phase(job_id):
+    """
+    Return the UWS phase of a job (PENDING, QUEUED, EXECUTING, COMPLETED,
+    ERROR, ABORTED, ...).
+    """
+    response = get_session().get(f"{TAP_ASYNC_URL}/{job_id}/phase", timeout=(TAP_CONNECT_TIMEOUT, TAP_READ_TIMEOUT))
+    response.raise_for_status()
+    return response.text.strip().upper()
+
+
+def tap_job_error(job_id):
+    response = get_session().get(f"{TAP_ASYNC_URL}/{job_id}/error", timeout=(TAP_CONNECT_TIMEOUT, TAP_READ_TIMEOUT))
+    return response.text.strip() if response.ok else None
+
+
+def iter_tap_job_bytes(job_id, timeout=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Like iter_tap_bytes, for the JSON result of a completed job: the body
+    is forwarded chunk by chunk and never parsed.
+    """
+    response = get_session().get(
+        f"{TAP_ASYNC_URL}/{job_id}/results/result",
+        timeout=(TAP_CONNECT_TIMEOUT, timeout or TAP_READ_TIMEOUT),
+        stream=True,
+    )
+    response.raise_for_status()
+    return _iter_body(response, chunk_size)
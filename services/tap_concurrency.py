@@ -0,0 +1,57 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.tap_cache import cached_tap_query, peek_cached
+
+# Thread pool per worker untuk query TAP yang tidak saling bergantung.
+# Seperti session di tap_client, pool dibuat ulang setelah fork.
+TAP_CONCURRENCY = int(os.getenv("TAP_CONCURRENCY", "8"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=TAP_CONCURRENCY, thread_name_prefix="tap")
+                _executor_pid = pid
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+def run_parallel(calls):
+    """
+    Run [(fn, args, kwargs), ...] concurrently and return their results in
+    order. The first exception raised by any call is re-raised.
+    """
+    futures = [submit(fn, *args, **kwargs) for fn, args, kwargs in calls]
+    return [future.result() for future in futures]
+
+
+def fetch_with_fallback(load_main, fallback_query, timeout=None):
+    """
+    Run the main loader and, speculatively and in parallel, the fallback
+    query used when the main result is empty.
+
+    Returns (data, fallback_data); fallback_data is None when the main
+    result is non-empty. The fallback is only fired speculatively when it
+    is not already cached, so a warm cache costs no extra upstream call.
+    """
+    fallback_future = None
+    if peek_cached(fallback_query) is None:
+        fallback_future = submit(cached_tap_query, fallback_query, timeout=timeout)
+
+    data = load_main()
+    if data:
+        return data, None
+    if fallback_future is not None:
+        return data, fallback_future.result()
+    return data, cached_tap_query(fallback_query, timeout=timeout)
@@ -0,0 +1,189 @@
+import os
+import re
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import jwt
+from flask import request
+from extensions import mongo
+from services.tap_client import normalize_query, tap_submit_async, tap_job_phase, tap_job_error, iter_tap_job_bytes
+from services.tap_cache import cached_tap_query
+
+# Gateway untuk ADQL bebas dari user (POST /api/tap-query).
+#   - query dinormalisasi + di-hash untuk cache
+#   - TOP selalu ada dan dibatasi
+#   - query sync diberi timeout pendek; query besar / lambat jadi job async
+#   - jumlah query bersamaan per user dibatasi per worker, jadi batas efektif
+#     per host = GATEWAY_USER_CONCURRENCY x jumlah worker gunicorn
+#   - hasil job async di-stream apa adanya, tidak masuk cache memori
+GATEWAY_DEFAULT_ROWS = int(os.getenv("TAP_GATEWAY_DEFAULT_ROWS", "1000"))
+GATEWAY_SYNC_MAX_ROWS = int(os.getenv("TAP_GATEWAY_SYNC_MAX_ROWS", "5000"))
+GATEWAY_MAX_ROWS = int(os.getenv("TAP_GATEWAY_MAX_ROWS", "100000"))
+GATEWAY_SYNC_TIMEOUT = int(os.getenv("TAP_GATEWAY_SYNC_TIMEOUT", "20"))
+GATEWAY_MAX_QUERY_LENGTH = int(os.getenv("TAP_GATEWAY_MAX_QUERY_LENGTH", "8000"))
+GATEWAY_USER_CONCURRENCY = int(os.getenv("TAP_GATEWAY_USER_CONCURRENCY", "2"))
+JOB_RESULT_TIMEOUT = int(os.getenv("TAP_GATEWAY_JOB_RESULT_TIMEOUT", "120"))
+JOBS_COLLECTION = "tap_jobs"
+
+FINAL_PHASES = {"COMPLETED", "ERROR", "ABORTED"}
+
+_SELECT_RE = re.compile(r"^SELECT\s+(?:(DISTINCT|ALL)\s+)?(?:TOP\s+(\d+)\s+)?", re.IGNORECASE)
+_JOB_ID_RE = re.compile(r"^[\w.-]{1,128}$")
+
+
+class QueryRejected(ValueError):
+    """Raised when user ADQL is not allowed through the gateway."""
+
+
+class QuotaExceeded(Exception):
+    """Raised when a user already has the maximum number of queries running."""
+
+
+def _outside_literals(adql):
+    # Potongan genap hasil split("'") berada di luar string literal ADQL
+    return "".join(adql.split("'")[0::2])
+
+
+def prepare_query(query, max_rows=GATEWAY_MAX_ROWS):
+    """
+    Normalize user ADQL and enforce the row limit.
+
+    Returns (adql, row_limit). A missing TOP gets GATEWAY_DEFAULT_ROWS and
+    a larger TOP is clamped to `max_rows`.
+    """
+    if not isinstance(query, str) or not query.strip():
+        raise QueryRejected("Query is required")
+    if len(query) > GATEWAY_MAX_QUERY_LENGTH:
+        raise QueryRejected(f"Query is longer than {GATEWAY_MAX_QUERY_LENGTH} characters")
+
+    adql = normalize_query(query).rstrip(";").strip()
+    if ";" in _outside_literals(adql):
+        raise QueryRejected("Only a single SELECT statement is allowed")
+    match = _SELECT_RE.match(adql)
+    if not match:
+        raise QueryRejected("Only SELECT queries are allowed")
+
+    quantifier, top = match.group(1), match.group(2)
+    row_limit = min(int(top), max_rows) if top else min(GATEWAY_DEFAULT_ROWS, max_rows)
+    head = f"SELECT {quantifier.upper() + ' ' if quantifier else ''}TOP {row_limit} "
+    return head + adql[match.end():], row_limit
+
+
+def query_hash(adql):
+    return hashlib.sha256(adql.encode()).hexdigest()[:16]
+
+
+def request_owner():
+    """
+    Identify the caller for quotas: the user id from the JWT when present,
+    otherwise the client IP.
+    """
+    token = request.cookies.get("access_token")
+    if not token:
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+    if token:
+        try:
+            decoded = jwt.decode(token, os.environ.get("JWT_SECRET", "secret"), algorithms=["HS256"])
+            return f"user:{decoded['id']}"
+        except Exception:
+            pass
+    # remote_addr sudah diisi ProxyFix (app.py) dari hop proxy tepercaya,
+    # bukan dari nilai X-Forwarded-For yang dikirim client
+    return f"ip:{request.remote_addr}"
+
+
+class ConcurrencyQuota:
+    """
+    Per-owner cap on queries running at the same time. The count lives in
+    this worker only, so a user spread over N workers can run up to
+    N * limit queries; it bounds how many threads one user can tie up in
+    a worker, not the load on the archive.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, owner):
+        with self._lock:
+            if self._running.get(owner, 0) >= self.limit:
+                raise QuotaExceeded(f"At most {self.limit} concurrent queries per user")
+            self._running[owner] = self._running.get(owner, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running[owner] -= 1
+                if not self._running[owner]:
+                    del self._running[owner]
+
+
+user_quota = ConcurrencyQuota(GATEWAY_USER_CONCURRENCY)
+
+
+def run_sync(adql):
+    """
+    Run a query through the result cache with the gateway's short timeout.
+    Raises requests.exceptions.Timeout when upstream is too slow.
+    """
+    # Tanpa retry: timeout langsung jatuh ke job async, worker tidak tertahan
+    return cached_tap_query(adql, timeout=GATEWAY_SYNC_TIMEOUT, retry=False)
+
+
+# ---------------------------------------------------------------------------
+# Async jobs
+# ---------------------------------------------------------------------------
+
+def _jobs():
+    return mongo.db[JOBS_COLLECTION]
+
+
+def submit_job(adql, owner):
+    """
+    Start a TAP async job and remember who owns it, so any worker can
+    answer status requests.
+    """
+    job_id = tap_submit_async(adql)
+    _jobs().insert_one({
+        "_id": job_id,
+        "owner": owner,
+        "query": adql,
+        "query_hash": query_hash(adql),
+        "phase": "QUEUED",
+        "created_at": datetime.utcnow(),
+    })
+    return job_id
+
+
+def get_job(job_id, owner):
+    """
+    Return the stored job for `owner` with a refreshed phase, or None.
+    """
+    if not _JOB_ID_RE.match(job_id):
+        return None
+    job = _jobs().find_one({"_id": job_id, "owner": owner})
+    if job is None:
+        return None
+    if job["phase"] not in FINAL_PHASES:
+        phase = tap_job_phase(job_id)
+        update = {"phase": phase, "checked_at": datetime.utcnow()}
+        if phase == "ERROR":
+            update["error"] = tap_job_error(job_id)
+        _jobs().update_one({"_id": job_id}, {"$set": update})
+        job.update(update)
+    return job
+
+
+def job_result_body(job):
+    """
+    Return an iterator over the raw JSON result of a completed job. Results
+    can be up to GATEWAY_MAX_ROWS rows, so they are passed through from the
+    archive as-is instead of being parsed and held in the worker's cache;
+    the archive keeps the result for as long as the job exists.
+    """
+    return iter_tap_job_bytes(job["_id"], timeout=JOB_RESULT_TIMEOUT)
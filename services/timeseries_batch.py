@@ -0,0 +1,110 @@
+import os
+import json
+from itertools import chain
+from concurrent.futures import as_completed
+from services.tap_cache import cached_tap_query
+from services.tap_concurrency import submit
+
+# Tabel time-series yang bisa diambil sekaligus untuk banyak source ID.
+TIMESERIES_CATALOGS = {
+    "kelt": {
+        "table": "kelttimeseries",
+        "id": "kelt_sourceid",
+        "columns": ["kelt_sourceid", "kelt_field", "kelt_orientation", "proc_type", "ra", "dec",
+                    "bjdstart", "bjdstop", "obsstart", "obsstop", "kelt_mag", "npts", "minvalue",
+                    "maxvalue", "mean", "stddevwrtmean", "median", "stddevwrtmedian", "n5sigma",
+                    "f5sigma", "medabsdev", "chisquared", "range595"],
+        "order": "bjdstart",
+    },
+    "superwasp": {
+        "table": "superwasptimeseries",
+        "id": "sourceid",
+        "columns": ["sourceid", "ra", "dec", "hjdstart", "hjdstop"],
+        "order": "hjdstart",
+    },
+    "ukirt": {
+        "table": "ukirttimeseries",
+        "id": "sourceid",
+        "columns": ["sourceid", "obs_year", "bulge", "field", "ccdid", "k2c9_flag", "ukirt_id",
+                    "moa_id", "statnpts", "minvalue", "maxvalue", "median"],
+        "order": "obs_year",
+    },
+}
+# ID per query IN (...): cukup kecil supaya URL query sync tetap aman
+BATCH_CHUNK_SIZE = int(os.getenv("TIMESERIES_CHUNK_SIZE", "50"))
+BATCH_MAX_IDS = int(os.getenv("TIMESERIES_MAX_IDS", "1000"))
+BATCH_TIMEOUT = 60
+MAX_ID_LENGTH = 100
+
+
+class BatchRequestError(ValueError):
+    """Raised for an invalid batch request (catalog or ids)."""
+
+
+def validate_ids(catalog, ids):
+    if catalog not in TIMESERIES_CATALOGS:
+        raise BatchRequestError(f"catalog must be one of: {', '.join(TIMESERIES_CATALOGS)}")
+    if not isinstance(ids, list) or not ids:
+        raise BatchRequestError("ids must be a non-empty list")
+    cleaned = list(dict.fromkeys(str(source_id).strip() for source_id in ids if str(source_id).strip()))
+    if not cleaned:
+        raise BatchRequestError("ids must contain at least one non-empty id")
+    if len(cleaned) > BATCH_MAX_IDS:
+        raise BatchRequestError(f"At most {BATCH_MAX_IDS} ids per request")
+    if any(len(source_id) > MAX_ID_LENGTH for source_id in cleaned):
+        raise BatchRequestError(f"ids must be at most {MAX_ID_LENGTH} characters")
+    return cleaned
+
+
+def chunk_query(spec, ids):
+    # Escape tanda kutip supaya ID tidak bisa keluar dari literal ADQL
+    literals = ", ".join("'" + source_id.replace("'", "''") + "'" for source_id in ids)
+    return (
+        f"SELECT {', '.join(spec['columns'])} FROM {spec['table']} "
+        f"WHERE {spec['id']} IN ({literals}) ORDER BY {spec['id']} ASC, {spec['order']} ASC"
+    )
+
+
+def fetch_batch(catalog, ids):
+    """
+    Start one cached TAP query per chunk of ids, all concurrently.
+
+    Waits for the first chunk so an upstream outage still surfaces as an
+    error status; returns an iterator of JSON body chunks that streams the
+    remaining chunks as they complete:
+        {"catalog", "data": [...], "missing_ids": [...], "errors": [...]}
+    """
+    spec = TIMESERIES_CATALOGS[catalog]
+    chunks = [ids[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(ids), BATCH_CHUNK_SIZE)]
+    futures = {submit(cached_tap_query, chunk_query(spec, chunk), timeout=BATCH_TIMEOUT): chunk for chunk in chunks}
+    completed = as_completed(futures)
+    first = next(completed)
+    try:
+        first.result()
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+
+    def body():
+        found = set()
+        errors = []
+        wrote_row = False
+        yield json.dumps({"catalog": catalog})[:-1] + ', "data": ['
+        # as_completed dibaca lazy: setiap chunk di-stream begitu selesai
+        for future in chain([first], completed):
+            try:
+                rows = future.result()
+            except Exception as e:
+                errors.append({"ids": futures[future], "error": str(e)})
+                continue
+            if not rows:
+                continue
+            found.update(str(row.get(spec["id"])) for row in rows)
+            yield ("," if wrote_row else "") + ",".join(json.dumps(row, default=str) for row in rows)
+            wrote_row = True
+        failed = {source_id for error in errors for source_id in error["ids"]}
+        missing = [source_id for source_id in ids if source_id not in found and source_id not in failed]
+        yield "], " + json.dumps({"missing_ids": missing, "errors": errors})[1:]
+
+    return body()
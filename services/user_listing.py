@@ -0,0 +1,124 @@
+import re
+import json
+from datetime import date, datetime
+from itertools import chain
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from flask import Response, stream_with_context
+from extensions import mongo
+from services.table_stream import iter_json_array
+from utils.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, QueryParamError
+
+# Listing user untuk admin (/api/admin/users) dan /api/user/all.
+# Keyset pagination di _id, pencarian prefix username/email (pakai index,
+# lihat services/db_indexes.py) dan proyeksi field; password tidak pernah ikut.
+USER_FIELDS = ("_id", "username", "email", "avatar", "role")
+USER_BATCH_SIZE = 500
+
+
+def json_default(value):
+    """
+    json.dumps `default` for Mongo documents: ObjectId -> hex string,
+    datetime/date -> ISO 8601.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def parse_user_query(args):
+    """
+    Turn request args into {"filter", "projection", "limit", "fields"}.
+    Without a limit the whole (filtered) listing is returned.
+    """
+    limit = None
+    if "limit" in args or "cursor" in args:
+        try:
+            limit = int(args.get("limit", DEFAULT_PAGE_LIMIT))
+        except ValueError:
+            raise QueryParamError("limit must be an integer")
+        if limit < 1:
+            raise QueryParamError("limit must be positive")
+        limit = min(limit, MAX_PAGE_LIMIT)
+
+    fields = None
+    projection = {"password": 0}
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in USER_FIELDS]
+        if unknown:
+            raise QueryParamError(f"Unknown fields: {', '.join(unknown)}")
+        projection = {field: 1 for field in fields}
+        projection.setdefault("_id", 1)  # tetap dibutuhkan untuk cursor
+
+    clauses = []
+    q = args.get("q", "").strip()
+    if q:
+        # Regex prefix ber-anchor (case-sensitive) bisa memakai index
+        prefix = {"$regex": "^" + re.escape(q)}
+        clauses.append({"$or": [{"username": prefix}, {"email": prefix}]})
+    if args.get("cursor"):
+        try:
+            clauses.append({"_id": {"$gt": ObjectId(args["cursor"])}})
+        except (InvalidId, TypeError):
+            raise QueryParamError("Invalid cursor")
+
+    return {
+        "filter": {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else {}),
+        "projection": projection,
+        "limit": limit,
+        "fields": fields,
+    }
+
+
+def _strip_id(fields, doc):
+    # _id hanya ikut di respons kalau diminta lewat fields
+    if fields is not None and "_id" not in fields:
+        doc.pop("_id", None)
+    return doc
+
+
+def _find(query, limit=None):
+    cursor = mongo.db.users.find(query["filter"], query["projection"]).sort("_id", 1).batch_size(USER_BATCH_SIZE)
+    return cursor.limit(limit) if limit else cursor
+
+
+def iter_users(query):
+    """
+    Stream the whole listing as JSON array chunks (one Mongo batch in
+    memory at a time). The first document is fetched eagerly so database
+    errors surface before the response starts.
+    """
+    docs = (_strip_id(query["fields"], doc) for doc in _find(query))
+    first = next(docs, None)
+    rows = chain([first], docs) if first is not None else iter(())
+    return iter_json_array(rows, default=json_default)
+
+
+def user_page(query):
+    """
+    One keyset page: {"data", "limit", "next_cursor"}.
+    """
+    docs = list(_find(query, query["limit"] + 1))
+    has_more = len(docs) > query["limit"]
+    docs = docs[:query["limit"]]
+    next_cursor = str(docs[-1]["_id"]) if has_more and docs else None
+    return {
+        "data": [_strip_id(query["fields"], doc) for doc in docs],
+        "limit": query["limit"],
+        "next_cursor": next_cursor,
+    }
+
+
+def user_listing_response(args):
+    """
+    JSON response for a listing request: a keyset page envelope when
+    `limit`/`cursor` is given, otherwise the filtered listing streamed as
+    a plain array (the original response shape).
+    """
+    query = parse_user_query(args)
+    if query["limit"] is None:
+        return Response(stream_with_context(iter_users(query)), mimetype="application/json")
+    return Response(json.dumps(user_page(query), default=json_default), mimetype="application/json")
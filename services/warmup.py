@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+from services.tap_client import normalize_query, tap_query_json
+from services.tap_cache import store, ttl_for_query, fill_disk
+from services import disk_cache
+from services.singleflight import fetch_once
+
+# Query "panas" yang di-prefetch saat worker boot dan di-refresh berkala,
+# supaya user pertama setelah restart dyno tidak menunggu download tabel.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_INTERVAL = int(os.getenv("WARMUP_INTERVAL", "3600"))
+WARMUP_RETRY_DELAY = int(os.getenv("WARMUP_RETRY_DELAY", "30"))
+WARMUP_TIMEOUT = int(os.getenv("WARMUP_TIMEOUT", "120"))
+
+_hot_queries = {}
+_status = {}
+_status_lock = threading.Lock()
+_thread = None
+_thread_pid = None
+_start_lock = threading.Lock()
+
+
+def register_hot_query(name, query, timeout=WARMUP_TIMEOUT, after=None):
+    """
+    `after` (optional) is called once the query has been warmed, e.g. to
+    precompute values derived from it.
+    """
+    _hot_queries[name] = {"query": query, "timeout": timeout, "after": after}
+
+
+def warm_query(name):
+    """
+    Make sure one hot query is in the shared disk tier and fresh, so it
+    never goes stale while the worker is up. The fill runs under the
+    query's fill lock: the first worker fetches, the others find the
+    fresh copy once the lock is free. Rows stay memory-mapped on disk
+    instead of being copied into every worker. Without the disk tier the
+    rows are cached in this worker's memory.
+    """
+    spec = _hot_queries[name]
+    key = normalize_query(spec["query"])
+    started = time.time()
+    try:
+        table = fill_disk(spec["query"], timeout=spec["timeout"])
+        if table is not None:
+            nrows = table.nrows
+        else:
+            # Tetap satu download tabel panas per host pada satu waktu
+            with disk_cache.fill_lock(key):
+                rows = fetch_once(key, lambda: tap_query_json(spec["query"], timeout=spec["timeout"]))
+            store(key, rows, ttl_for_query(key))
+            nrows = len(rows)
+        if spec["after"]:
+            spec["after"]()
+        status = {"ok": True, "rows": nrows, "warmed_at": time.time(), "duration_s": round(time.time() - started, 2)}
+    except Exception as e:
+        print(f"❌ Warmup failed for {name}: {e}")
+        with _status_lock:
+            previous = _status.get(name, {})
+        status = dict(previous, ok=previous.get("ok", False), error=str(e), failed_at=time.time())
+    with _status_lock:
+        _status[name] = status
+    return status["ok"]
+
+
+def warm_all():
+    return all([warm_query(name) for name in list(_hot_queries)])
+
+
+def is_ready():
+    """
+    A worker is ready once every hot query has been warmed at least once.
+    """
+    if not WARMUP_ENABLED:
+        return True
+    with _status_lock:
+        return all(_status.get(name, {}).get("ok") for name in _hot_queries)
+
+
+def get_warmup_status():
+    ready = is_ready()
+    with _status_lock:
+        queries = {name: dict(_status.get(name, {"ok": False})) for name in _hot_queries}
+    return {"ready": ready, "enabled": WARMUP_ENABLED, "queries": queries}
+
+
+def _loop():
+    while True:
+        ok = warm_all()
+        disk_cache.prune()
+        # Sampai semua query pernah berhasil, coba lagi lebih cepat
+        time.sleep(WARMUP_INTERVAL if ok else WARMUP_RETRY_DELAY)
+
+
+def start_warmup():
+    """
+    Start the warmup thread for this worker (idempotent; restarted after
+    fork so gunicorn --preload also works).
+    """
+    global _thread, _thread_pid
+    if not WARMUP_ENABLED or not _hot_queries:
+        return None
+    pid = os.getpid()
+    with _start_lock:
+        if _thread is None or _thread_pid != pid or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name="tap-warmup", daemon=True)
+            _thread.start()
+            _thread_pid = pid
+    return _thread
@@ -0,0 +1,258 @@
+import os
+import gzip
+import zlib
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opsional; tanpa brotli hanya zstd/gzip yang ditawarkan
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Kompresi respons API yang dinegosiasikan lewat Accept-Encoding.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow.stream",
+    "text/plain",
+    "text/csv",
+}
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", "6"))
+
+# Body yang sudah dikompresi disimpan per (ETag, encoding), jadi payload
+# tabel yang sama hanya dikompresi sekali per refresh data, bukan per request.
+# Body buffered disimpan di memori; body stream dari tier disk disimpan
+# sebagai file di direktori versi entri cache disk-nya (ikut terhapus
+# bersama versi itu), lihat stream_body_dir.
+PRECOMPRESSED_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+BODY_FILE_CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings():
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding():
+    """
+    Pick the best Content-Encoding the client accepts, or None.
+    """
+    if not request.accept_encodings:
+        return None
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(data, encoding):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def iter_compressed(chunks, encoding):
+    """
+    Compress a streamed body chunk by chunk.
+    """
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        process, finish = compressor.compress, compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        # Tutup generator asal (mis. koneksi upstream) saat klien putus
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def iter_body_file(fh, chunk_size=BODY_FILE_CHUNK_SIZE):
+    with fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_saving(chunks, path):
+    """
+    Pass `chunks` through while writing them to `path`. The file only
+    appears (atomically) once the whole body was sent, so an interrupted
+    response never leaves a truncated body behind; write errors just stop
+    the saving, not the response.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        fh = open(tmp_path, "wb")
+    except OSError:
+        fh = None
+    try:
+        for chunk in chunks:
+            if fh is not None:
+                try:
+                    fh.write(chunk)
+                except OSError:
+                    fh.close()
+                    fh = None
+                    _remove(tmp_path)
+            yield chunk
+        if fh is not None:
+            fh.close()
+            fh = None
+            os.replace(tmp_path, path)
+    finally:
+        if fh is not None:
+            fh.close()
+            _remove(tmp_path)
+
+
+class PrecompressedCache:
+    """
+    LRU of compressed bodies bounded by total size in bytes.
+    """
+
+    def __init__(self, max_bytes=PRECOMPRESSED_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+precompressed = PrecompressedCache()
+
+
+def _compressible(response):
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and request.method != "HEAD"
+    )
+
+
+def stream_body_dir(response, directory):
+    """
+    Let compress_response keep the compressed form of a streamed response
+    in `directory` (an immutable per-version directory), keyed by the
+    response's version ETag, and serve it from there next time.
+    """
+    response.body_dir = directory
+    return response
+
+
+def _compress_stream(response, encoding):
+    etag, _ = response.get_etag()
+    directory = getattr(response, "body_dir", None)
+    if not etag or not directory:
+        response.response = iter_compressed(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        return
+    path = os.path.join(directory, f"body.{etag}.{encoding}")
+    try:
+        # Dibuka sekarang: kalau versinya dihapus prune() setelah ini, file
+        # yang sudah terbuka tetap bisa dibaca sampai selesai
+        fh = open(path, "rb")
+    except OSError:
+        # Request pertama untuk versi ini: kompresi sambil menyimpan ke file
+        response.response = iter_saving(iter_compressed(response.response, encoding), path)
+        response.headers.pop("Content-Length", None)
+        return
+    chunks = response.response
+    if hasattr(chunks, "close"):
+        chunks.close()
+    response.response = iter_body_file(fh)
+    response.headers["Content-Length"] = str(os.fstat(fh.fileno()).st_size)
+
+
+def compress_response(response):
+    """
+    after_request hook: compress API responses for clients that accept it.
+    """
+    if not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        _compress_stream(response, encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        etag, weak = response.get_etag()
+        # Hanya ETag kuat (hash konten dari add_etag) aman dipakai sebagai kunci
+        cache_key = (etag, encoding) if etag and not weak else None
+        body = precompressed.get(cache_key) if cache_key else None
+        if body is None:
+            body = compress(data, encoding)
+            if cache_key:
+                precompressed.set(cache_key, body)
+        response.set_data(body)
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Representasi terkompresi tidak identik byte-per-byte; ETag lemah
+        # tetap cocok untuk If-None-Match (perbandingan weak).
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,118 @@
+import io
+import json
+from flask import Response, jsonify, request
+from utils.error import error_handler
+
+# Format output tabel yang didukung selain JSON array of objects (default).
+FORMAT_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "columns": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+ACCEPT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+FILE_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when the requested output format is unknown or unavailable."""
+
+
+def negotiate_format():
+    """
+    Pick the output format from ?format= (wins) or the Accept header.
+    Returns None for plain JSON so routes keep their default path.
+    """
+    fmt = request.args.get("format")
+    if fmt:
+        fmt = fmt.lower()
+        if fmt == "json":
+            return None
+        if fmt not in FORMAT_MIMETYPES:
+            raise UnsupportedFormatError(f"Unsupported format '{fmt}'. Use one of: json, {', '.join(FORMAT_MIMETYPES)}")
+        return fmt
+    best = request.accept_mimetypes.best_match(["application/json"] + list(ACCEPT_FORMATS))
+    return ACCEPT_FORMATS.get(best)
+
+
+def rows_to_columns(rows):
+    """
+    Transpose row dicts into {"columns": [...], "data": {column: [values]}}.
+    """
+    columns = list(rows[0].keys()) if rows else []
+    return {
+        "columns": columns,
+        "data": {column: [row.get(column) for row in rows] for column in columns},
+    }
+
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def _arrow_table(rows):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedFormatError("Arrow/Parquet output requires pyarrow to be installed")
+    return pa, pa.Table.from_pylist(rows)
+
+
+def _arrow_errors():
+    # Error encoding pyarrow (ArrowInvalid, ArrowTypeError, ...) adalah subclass
+    # ValueError; harus ditangkap di sini supaya tidak dilaporkan sebagai
+    # "Invalid JSON" dari upstream oleh route
+    try:
+        from pyarrow.lib import ArrowException
+    except ImportError:
+        return ()
+    return (ArrowException,)
+
+
+def _arrow_bytes(rows):
+    pa, table = _arrow_table(rows)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _parquet_bytes(rows):
+    _, table = _arrow_table(rows)
+    import pyarrow.parquet as pq
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue()
+
+
+def format_rows(rows, fmt, name="data"):
+    """
+    Build a response for `rows` in the negotiated format.
+    """
+    if fmt == "columns":
+        return jsonify(rows_to_columns(rows))
+    if fmt == "ndjson":
+        return Response(_iter_ndjson(rows), mimetype=FORMAT_MIMETYPES[fmt])
+    if fmt in ("arrow", "parquet"):
+        try:
+            body = _arrow_bytes(rows) if fmt == "arrow" else _parquet_bytes(rows)
+        except _arrow_errors() as e:
+            return error_handler(500, f"Failed to encode the data as {fmt}: {e}")
+        response = Response(body, mimetype=FORMAT_MIMETYPES[fmt])
+        response.headers["Content-Disposition"] = f'attachment; filename="{name}.{FILE_EXTENSIONS[fmt]}"'
+        return response
+    return jsonify(rows)
+
+
+def format_error(e):
+    return error_handler(406, str(e))
@@ -0,0 +1,60 @@
+import os
+import hashlib
+from datetime import datetime, timezone
+from flask import Response, request
+
+# Header cache HTTP untuk endpoint arsip. Browser boleh memakai respons
+# selama BROWSER_MAX_AGE detik, CDN selama CDN_MAX_AGE, dan setelah itu
+# revalidasi lewat ETag / Last-Modified (304 tanpa body).
+BROWSER_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+CDN_MAX_AGE = int(os.getenv("HTTP_CACHE_CDN_MAX_AGE", "3600"))
+STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "86400"))
+
+
+def cache_control(max_age=None, cdn_max_age=None):
+    max_age = BROWSER_MAX_AGE if max_age is None else max_age
+    cdn_max_age = CDN_MAX_AGE if cdn_max_age is None else cdn_max_age
+    return f"public, max-age={max_age}, s-maxage={cdn_max_age}, stale-while-revalidate={STALE_WHILE_REVALIDATE}"
+
+
+def version_etag(*parts):
+    """
+    Build an ETag from what identifies a response (URL, query, data time)
+    for bodies that are streamed and can't be hashed up front.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return digest[:32]
+
+
+def apply_cache_headers(response, last_modified=None, etag=None, max_age=None, cdn_max_age=None):
+    """
+    Add Cache-Control, Last-Modified and an ETag to a 200 response and turn
+    it into a 304 when the request's If-None-Match / If-Modified-Since match.
+
+    Buffered bodies get a content-hash ETag; streamed bodies only get one
+    when `etag` (a weak, version-based tag) is given.
+    """
+    if response.status_code != 200:
+        return response
+    if etag:
+        response.set_etag(etag, weak=True)
+    elif not response.is_streamed:
+        response.add_etag()
+    if last_modified:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    response.headers["Cache-Control"] = cache_control(max_age, cdn_max_age)
+    response.vary.add("Accept")
+    return response.make_conditional(request)
+
+
+def not_modified(etag, last_modified=None, max_age=None, cdn_max_age=None):
+    """
+    Return a 304 response if the client already has this version, else None.
+    Lets streamed routes answer revalidations before touching the data.
+    """
+    if not etag:
+        return None
+    if not request.if_none_match and not request.if_modified_since:
+        return None
+    response = apply_cache_headers(Response(), last_modified, etag, max_age, cdn_max_age)
+    return response if response.status_code == 304 else None
@@ -0,0 +1,171 @@
+import base64
+import json
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+# Spec paginasi (lihat services.table_registry.page_spec_for):
+#   order     : kolom ORDER BY (keyset), tiebreak : kolom unik penentu urutan
+#   numeric   : kolom yang boleh difilter dengan <kolom>_min / <kolom>_max
+#   equality  : kolom yang boleh difilter dengan <kolom>=nilai
+
+PAGE_PARAMS = ("limit", "cursor", "fields")
+
+
+class QueryParamError(ValueError):
+    """Raised for invalid pagination/filter query parameters."""
+
+
+def wants_page_query(args, spec):
+    """
+    True if the request uses any pagination, projection or filter param.
+    Without them the routes keep returning the whole table as before.
+    """
+    wanted = False
+    for name in args:
+        if name in PAGE_PARAMS or name in spec["equality"]:
+            wanted = True
+        elif name.endswith("_min") or name.endswith("_max"):
+            # Filter range pada kolom yang tidak diizinkan ditolak, bukan diabaikan
+            if name[:-4] not in spec["numeric"]:
+                raise QueryParamError(f"Unknown filter: {name}")
+            wanted = True
+    return wanted
+
+
+def encode_cursor(row, spec):
+    payload = json.dumps([row.get(spec["order"]), row.get(spec["tiebreak"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, tiebreak = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise QueryParamError("Invalid cursor")
+    return value, tiebreak
+
+
+def _adql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise QueryParamError("Invalid filter value")
+    return repr(value)
+
+
+def _parse_number(name, raw):
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        raise QueryParamError(f"{name} must be a number")
+
+
+def parse_page_query(args, spec):
+    """
+    Turn request args into a page query: selected columns, ADQL WHERE
+    clauses, an equivalent Mongo filter, limit and decoded cursor.
+    """
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        raise QueryParamError("limit must be an integer")
+    if limit < 1:
+        raise QueryParamError("limit must be positive")
+    limit = min(limit, MAX_PAGE_LIMIT)
+
+    fields = spec["columns"]
+    derived = spec.get("derived", {})
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in spec["columns"] and f not in derived]
+        if unknown:
+            raise QueryParamError(f"Unknown fields: {', '.join(unknown)}")
+
+    where = list(spec["where"])
+    mongo_filter = dict(spec["mongo_filter"])
+
+    for column in spec["numeric"]:
+        bounds = {}
+        for suffix, op, mongo_op in (("_min", ">=", "$gte"), ("_max", "<=", "$lte")):
+            raw = args.get(column + suffix)
+            if raw is None:
+                continue
+            value = _parse_number(column + suffix, raw)
+            where.append(f"{column} {op} {_adql_literal(value)}")
+            bounds[mongo_op] = value
+        if bounds:
+            existing = mongo_filter.get(column)
+            mongo_filter[column] = dict(existing, **bounds) if isinstance(existing, dict) else bounds
+
+    for column in spec["equality"]:
+        raw = args.get(column)
+        if raw is None:
+            continue
+        where.append(f"{column} = {_adql_literal(raw)}")
+        mongo_filter = {"$and": [mongo_filter, {column: raw}]}
+
+    cursor = None
+    if args.get("cursor"):
+        cursor = decode_cursor(args["cursor"])
+        value, tiebreak = cursor
+        order, tb = spec["order"], spec["tiebreak"]
+        where.append(
+            f"({order} > {_adql_literal(value)} OR ({order} = {_adql_literal(value)} AND {tb} > {_adql_literal(tiebreak)}))"
+        )
+        mongo_filter = {"$and": [mongo_filter, {"$or": [
+            {order: {"$gt": value}},
+            {order: value, tb: {"$gt": tiebreak}},
+        ]}]}
+
+    return {
+        "fields": fields,
+        "derived": [f for f in fields if f in derived],
+        "where": where,
+        "mongo_filter": mongo_filter,
+        "limit": limit,
+        "cursor": cursor,
+    }
+
+
+def build_page_adql(spec, page):
+    """
+    Build the pushed-down ADQL for one page. One extra row is requested so
+    we know whether a next page exists.
+    """
+    # Kolom turunan tidak ada di TAP; yang di-select adalah kolom inputnya
+    select = [f for f in page["fields"] if f not in page["derived"]]
+    helpers = [spec["order"], spec["tiebreak"]]
+    for field in page["derived"]:
+        helpers.extend(spec["derived"][field])
+    for column in helpers:
+        if column not in select:
+            select.append(column)
+    return (
+        f"SELECT TOP {page['limit'] + 1} {', '.join(select)} "
+        f"FROM {spec['table']} "
+        f"WHERE {' AND '.join(page['where'])} "
+        f"ORDER BY {spec['order']} ASC, {spec['tiebreak']} ASC"
+    )
+
+
+def page_sort(spec):
+    return [(spec["order"], 1), (spec["tiebreak"], 1)]
+
+
+def build_page_response(rows, spec, page):
+    """
+    Trim the look-ahead row, compute next_cursor and drop helper columns
+    that were only selected for keyset ordering.
+    """
+    has_more = len(rows) > page["limit"]
+    rows = rows[:page["limit"]]
+    next_cursor = encode_cursor(rows[-1], spec) if has_more and rows else None
+    fields = page["fields"]
+    if set(fields) != set(rows[0].keys() if rows else fields):
+        rows = [{field: row.get(field) for field in fields} for row in rows]
+    return {
+        "data": rows,
+        "limit": page["limit"],
+        "next_cursor": next_cursor,
+    }
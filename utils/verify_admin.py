@@ -1,8 +1,71 @@
 from flask import request, jsonify
 from functools import wraps
+from bson.objectid import ObjectId
+import threading
+import time
 import jwt
 import os
 
+# Cache principal admin per token (per worker), supaya request dashboard
+# tidak perlu satu find_one ke Mongo per widget. TTL pendek membatasi
+# berapa lama perubahan role dari worker lain baru terlihat.
+ADMIN_PRINCIPAL_TTL = int(os.getenv("ADMIN_PRINCIPAL_TTL", "60"))
+ADMIN_PRINCIPAL_MAX = 1024
+
+_principals = {}   # token id -> (principal, expires)
+_principals_lock = threading.Lock()
+
+
+def _token_id(decoded, token):
+    # Token lama (sebelum ada jti) dikenali dari token mentahnya
+    return decoded.get("jti") or token
+
+
+def _cached_principal(token_id):
+    with _principals_lock:
+        entry = _principals.get(token_id)
+        if entry is None:
+            return None
+        principal, expires = entry
+        if expires <= time.monotonic():
+            del _principals[token_id]
+            return None
+        return principal
+
+
+def _cache_principal(token_id, principal):
+    with _principals_lock:
+        if len(_principals) >= ADMIN_PRINCIPAL_MAX:
+            now = time.monotonic()
+            for key in [key for key, (_, expires) in _principals.items() if expires <= now]:
+                del _principals[key]
+            if len(_principals) >= ADMIN_PRINCIPAL_MAX:
+                _principals.pop(next(iter(_principals)))
+        _principals[token_id] = (principal, time.monotonic() + ADMIN_PRINCIPAL_TTL)
+
+
+def invalidate_principal(user_id):
+    """
+    Drop every cached admin principal of `user_id` (after a role change
+    or deletion) so their next request is checked against the database.
+    Only this worker's cache is cleared: other workers keep accepting the
+    user's token until their entry expires, at most ADMIN_PRINCIPAL_TTL
+    seconds later.
+    """
+    user_id = str(user_id)
+    with _principals_lock:
+        for key in [key for key, (principal, _) in _principals.items() if principal["id"] == user_id]:
+            del _principals[key]
+
+
+def _load_principal(user_id):
+    from extensions import mongo
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"role": 1})
+    if not user or user.get("role") != "admin":
+        return None
+    return {"id": str(user["_id"]), "role": user["role"]}
+
+
 def verify_admin(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -11,11 +74,16 @@ def verify_admin(f):
             return jsonify({"error": "Unauthorized"}), 401
         try:
             decoded = jwt.decode(token, os.environ.get("JWT_SECRET", "secret"), algorithms=["HS256"])
-            from extensions import mongo
-            user = mongo.db.users.find_one({"_id": decoded["id"]})
-            if not user or user.get("role") != "admin":
-                return jsonify({"error": "Forbidden. Admin only."}), 403
-            request.user = {"id": str(user["_id"]), "role": user["role"]}
+            # Klaim role di token tidak dipercaya (bisa basi setelah user
+            # dipromosikan): selalu dicek ke database saat tidak ada di cache
+            token_id = _token_id(decoded, token)
+            principal = _cached_principal(token_id)
+            if principal is None:
+                principal = _load_principal(decoded["id"])
+                if principal is None:
+                    return jsonify({"error": "Forbidden. Admin only."}), 403
+                _cache_principal(token_id, principal)
+            request.user = dict(principal)
         except Exception as e:
             return jsonify({"error": "Invalid token"}), 403
         return f(*args, **kwargs)